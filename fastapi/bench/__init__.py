@@ -0,0 +1 @@
+"""Load-testing and benchmark harness."""
\ No newline at end of file
@@ -0,0 +1,314 @@
+"""Benchmark the REST endpoints and MCP tools against a local upstream stub.
+
+By default the harness starts the FakeStore stand-in (`src.stub.fakestore`)
+and the API (`src.main:app`) as uvicorn subprocesses on free ports, drives
+every scenario with a fixed number of concurrent clients and prints a JSON
+report with p50/p95/p99 latency, throughput and error rate per scenario.
+
+Usage:
+    python -m bench.run --concurrency 32 --duration 10
+    python -m bench.run --scenarios products,mcp_get_product --workers 4
+    python -m bench.run --env PRODUCT_CACHE_ENABLED=false --output no-cache.json
+    python -m bench.run --target http://localhost:3002   # reuse a running API
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+import httpx
+
+ROOT = Path(__file__).resolve().parents[1]
+
+AUTH_HEADERS = {"Authorization": "Bearer 1"}
+
+
+@dataclass
+class ScenarioResult:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0.0
+
+    def report(self) -> Dict[str, Any]:
+        requests = len(self.latencies)
+        latencies = sorted(self.latencies)
+
+        def percentile(p: float) -> float | None:
+            if not latencies:
+                return None
+            rank = max(int(round(p / 100 * len(latencies))) - 1, 0)
+            return round(latencies[rank] * 1000, 3)
+
+        return {
+            "requests": requests,
+            "errors": self.errors,
+            "errorRate": round(self.errors / requests, 4) if requests else None,
+            "throughput": round(requests / self.elapsed, 2) if self.elapsed else None,
+            "latencyMs": {
+                "p50": percentile(50),
+                "p95": percentile(95),
+                "p99": percentile(99),
+                "mean": round(sum(latencies) / requests * 1000, 3) if requests else None,
+                "max": round(latencies[-1] * 1000, 3) if latencies else None,
+            },
+        }
+
+
+# A scenario call returns True on success
+Call = Callable[[], Awaitable[bool]]
+
+
+def http_scenarios(client: httpx.AsyncClient) -> Dict[str, Call]:
+    async def products() -> bool:
+        return (await client.get("/products")).status_code == 200
+
+    async def single_product() -> bool:
+        return (await client.post("/products/single-product", json={"id": 1})).status_code == 200
+
+    async def get_cart() -> bool:
+        response = await client.post("/carts/get-cart", json={"cartId": 1}, headers=AUTH_HEADERS)
+        return response.status_code == 200
+
+    async def manage_cart() -> bool:
+        response = await client.post(
+            "/carts/manage-cart",
+            json={"products": [{"id": 1, "quantity": 2}, {"id": 2, "quantity": 1}]},
+            headers=AUTH_HEADERS,
+        )
+        return response.status_code in (200, 201)
+
+    return {
+        "products": products,
+        "single_product": single_product,
+        "get_cart": get_cart,
+        "manage_cart": manage_cart,
+    }
+
+
+MCP_TOOL_CALLS = {
+    "mcp_get_all_products": ("get_all_products", {}),
+    "mcp_get_product": ("get_product", {"id": 1}),
+    "mcp_get_cart": ("get_cart", {"cartId": 1}),
+}
+
+SCENARIOS = ("products", "single_product", "get_cart", "manage_cart", *MCP_TOOL_CALLS)
+
+
+async def run_http_scenario(
+    call: Call, concurrency: int, duration: float, max_requests: int | None
+) -> ScenarioResult:
+    result = ScenarioResult()
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+
+    async def worker() -> None:
+        while time.perf_counter() < deadline:
+            if max_requests is not None and len(result.latencies) >= max_requests:
+                return
+            begin = time.perf_counter()
+            try:
+                ok = await call()
+            except httpx.HTTPError:
+                ok = False
+            result.latencies.append(time.perf_counter() - begin)
+            result.errors += not ok
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.elapsed = time.perf_counter() - started
+
+    return result
+
+
+async def run_mcp_scenario(
+    base_url: str, tool: str, arguments: Dict[str, Any],
+    concurrency: int, duration: float, max_requests: int | None,
+) -> ScenarioResult:
+    # Imported lazily: `mcp` comes with fastapi-mcp, but the REST scenarios don't need it
+    from mcp import ClientSession
+    from mcp.client.sse import sse_client
+
+    result = ScenarioResult()
+    ready = asyncio.Event()
+    sessions_ready = 0
+    window: Dict[str, float] = {}
+
+    async def worker() -> None:
+        nonlocal sessions_ready
+
+        # One MCP session per simulated agent, set up outside the timed window
+        async with sse_client(f"{base_url}/mcp", headers=AUTH_HEADERS) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+
+                sessions_ready += 1
+                if sessions_ready == concurrency:
+                    window["start"] = time.perf_counter()
+                    window["deadline"] = window["start"] + duration
+                    ready.set()
+                await ready.wait()
+
+                while time.perf_counter() < window["deadline"]:
+                    if max_requests is not None and len(result.latencies) >= max_requests:
+                        return
+                    begin = time.perf_counter()
+                    try:
+                        ok = not (await session.call_tool(tool, arguments)).isError
+                    except Exception:
+                        ok = False
+                    result.latencies.append(time.perf_counter() - begin)
+                    result.errors += not ok
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.elapsed = time.perf_counter() - window["start"]
+
+    return result
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(app: str, port: int, env: Dict[str, str], workers: int = 1) -> subprocess.Popen:
+    command = [
+        sys.executable, "-m", "uvicorn", app,
+        "--port", str(port), "--workers", str(workers),
+        "--log-level", "warning", "--no-access-log",
+    ]
+
+    return subprocess.Popen(command, cwd=ROOT, env={**os.environ, **env})
+
+
+async def _wait_until_up(url: str, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.perf_counter() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"Server for {url} exited with code {process.returncode}")
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.2)
+
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    processes: List[subprocess.Popen] = []
+    base_url = args.target
+
+    try:
+        if base_url is None:
+            stub_port, app_port = _free_port(), _free_port()
+            stub_env = {
+                "ENVIRONMENT": "LOCAL",
+                "FAKESTORE_STUB_LATENCY_MS": str(args.stub_latency_ms),
+                "FAKESTORE_STUB_ERROR_RATE": str(args.stub_error_rate),
+                "FAKESTORE_STUB_PRODUCTS": str(args.stub_products),
+            }
+            app_env = {
+                "ENVIRONMENT": "LOCAL",
+                "UPSTREAM_BASE_URL": f"http://127.0.0.1:{stub_port}",
+                **dict(item.split("=", 1) for item in args.env),
+            }
+            processes.append(_start_server("src.stub.fakestore:app", stub_port, stub_env))
+            processes.append(_start_server("src.main:app", app_port, app_env, args.workers))
+            base_url = f"http://127.0.0.1:{app_port}"
+
+            await _wait_until_up(f"http://127.0.0.1:{stub_port}/products/1", processes[0])
+            await _wait_until_up(f"{base_url}/healthcheck", processes[1])
+
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        reports: Dict[str, Any] = {}
+
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+            calls = http_scenarios(client)
+
+            for name in args.scenarios:
+                if args.warmup:
+                    # Untimed pass so the first scenario doesn't pay for cold caches
+                    if name in calls:
+                        await run_http_scenario(calls[name], 1, args.warmup, None)
+
+                if name in MCP_TOOL_CALLS:
+                    tool, arguments = MCP_TOOL_CALLS[name]
+                    result = await run_mcp_scenario(
+                        base_url, tool, arguments, args.concurrency, args.duration, args.requests
+                    )
+                else:
+                    result = await run_http_scenario(
+                        calls[name], args.concurrency, args.duration, args.requests
+                    )
+
+                reports[name] = result.report()
+                print(f"{name}: {json.dumps(reports[name])}", file=sys.stderr)
+
+        return {
+            "config": {
+                "target": args.target or "local",
+                "concurrency": args.concurrency,
+                "duration": args.duration,
+                "requests": args.requests,
+                "workers": args.workers,
+                "stubLatencyMs": args.stub_latency_ms,
+                "stubErrorRate": args.stub_error_rate,
+                "stubProducts": args.stub_products,
+                "env": args.env,
+            },
+            "scenarios": reports,
+        }
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", help="Base URL of a running API; by default API and stub are started locally")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        type=lambda value: [name for name in value.split(",") if name],
+                        help=f"Comma separated scenarios (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients per scenario")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run each scenario")
+    parser.add_argument("--requests", type=int, default=None, help="Stop a scenario after this many requests")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Untimed warm-up seconds per REST scenario")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the local API")
+    parser.add_argument("--stub-latency-ms", type=float, default=20.0, help="Latency injected by the upstream stub")
+    parser.add_argument("--stub-error-rate", type=float, default=0.0, help="Error rate injected by the upstream stub")
+    parser.add_argument("--stub-products", type=int, default=20, help="Catalog size served by the upstream stub")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra settings for the local API, e.g. PRODUCT_CACHE_ENABLED=false")
+    parser.add_argument("--output", type=Path, help="Write the JSON report to this file instead of stdout")
+
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    return args
+
+
+def main(argv: List[str] | None = None) -> None:
+    args = parse_args(argv)
+    report = json.dumps(asyncio.run(run(args)), indent=2)
+
+    if args.output:
+        args.output.write_text(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""Micro-benchmark of request validation.
+
+Compares the compiled single-pass validators (`src.validation.engine`)
+against the previous implementation, copied below unchanged as the
+baseline: a two-pass products check with repeated `str(...).isdigit()` and
+`int(...)` conversions, and for get_cart a throwaway Pydantic model plus one
+timed validator call per field.
+Prints a JSON report with the mean time per call and the speedup.
+
+Usage:
+    python -m bench.validation
+    python -m bench.validation --sizes 10,100,1000 --repeat 7
+"""
+
+import argparse
+import json
+import os
+import timeit
+from typing import Any, Callable, Dict, List, Sequence
+
+os.environ.setdefault("ENVIRONMENT", "LOCAL")
+
+from fastapi import HTTPException, status  # noqa: E402
+from pydantic import BaseModel  # noqa: E402
+
+from src.utils.projection import CART_FIELDS  # noqa: E402
+from src.utils.timing import timed  # noqa: E402
+from src.validation.cart import GET_CART_REQUEST, validate_products  # noqa: E402
+
+
+class GetCartRequest(BaseModel):
+    """Request schema for getting a cart"""
+    cartId: int | str
+
+
+@timed("validate")
+def baseline_validate_products(
+    products: Any,
+    min_quantity: int = 1,
+    require_quantity: bool = False,
+) -> List[Dict[str, Any]]:
+    """The previous `validate_products`, unchanged.
+
+    Args:
+        products: The products list from the request body
+        min_quantity: Lowest accepted quantity (0 lets set_quantity remove lines)
+        require_quantity: Whether every product must have a quantity
+    """
+    if not isinstance(products, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The 'products' field must be an array of product objects. Please provide products as: [{\"id\": 1, \"quantity\": 2}, {\"id\": 2, \"quantity\": 1}]"
+        )
+
+    validated_products = []
+    has_format_errors = False
+    has_id_errors = False
+    has_quantity_errors = False
+
+    for product in products:
+        if not isinstance(product, dict):
+            has_format_errors = True
+            continue
+
+        # Validate product ID
+        if "id" not in product:
+            has_id_errors = True
+        else:
+            product_id = product["id"]
+            if not isinstance(product_id, (int, str)):
+                has_id_errors = True
+            else:
+                try:
+                    int(product_id)
+                except ValueError:
+                    has_id_errors = True
+
+        # Validate quantity if provided
+        if require_quantity and "quantity" not in product:
+            has_quantity_errors = True
+        elif "quantity" in product:
+            quantity = product["quantity"]
+            if not isinstance(quantity, (int, str)):
+                has_quantity_errors = True
+            else:
+                try:
+                    validated_quantity = int(quantity)
+                    if validated_quantity < min_quantity:
+                        has_quantity_errors = True
+                except ValueError:
+                    has_quantity_errors = True
+
+        # If no errors for this product, add it to validated products
+        if (isinstance(product, dict) and 
+            "id" in product and 
+            isinstance(product["id"], (int, str)) and
+            str(product["id"]).isdigit() and
+            (("quantity" not in product and not require_quantity) or 
+             ("quantity" in product and
+              isinstance(product["quantity"], (int, str)) and 
+              str(product["quantity"]).isdigit() and 
+              int(product["quantity"]) >= min_quantity))):
+            
+            validated_product = {"id": int(product["id"])}
+            if "quantity" in product:
+                validated_product["quantity"] = int(product["quantity"])
+            validated_products.append(validated_product)
+
+    # Provide general guidance based on error types found
+    error_messages = []
+    
+    if has_format_errors:
+        error_messages.append("Some products are not properly formatted. Each product must be an object with an 'id' field.")
+    
+    if has_id_errors:
+        error_messages.append("Some products have invalid IDs. Product IDs must be positive integers (e.g., 1, 2, 3).")
+    
+    if has_quantity_errors:
+        error_messages.append(f"Some products have invalid quantities. Quantities must be integers of {min_quantity} or greater{' and are required' if require_quantity else ''}.")
+
+    if error_messages:
+        quantity_rule = "required" if require_quantity else "optional"
+        guidance = f" Please ensure all products follow this format: {{\"id\": 1, \"quantity\": 2}} where 'id' is a positive integer and 'quantity' is {quantity_rule} and must be {min_quantity} or greater."
+        error_detail = "There are issues with the products in your request. " + " ".join(error_messages) + guidance
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error_detail
+        )
+
+    return validated_products
+
+
+def baseline_validate_required_field(body: Dict[str, Any], field: str, example: str):
+    """The previous `validate_required_field`, unchanged."""
+    if not body or field not in body:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Missing required field: {field}. Example: {example}"
+        )
+
+
+@timed("validate")
+def baseline_validate_cart_id(cart_id: Any) -> int | str:
+    """The previous `validate_cart_id`, unchanged."""
+    if cart_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cart ID is required. Please provide a valid cart ID as an integer (e.g., 1, 2, 3) or string (e.g., '1', '2', '3')."
+        )
+
+    if not isinstance(cart_id, (int, str)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cart ID must be an integer or string. Please provide a valid cart ID like 1 or '1'."
+        )
+
+    return cart_id
+
+
+@timed("validate")
+def baseline_validate_fields(fields: Any, allowed: Sequence[str]) -> List[str] | None:
+    """The previous `validate_fields`, unchanged."""
+    if fields is None:
+        return None
+
+    if isinstance(fields, str):
+        fields = [field.strip() for field in fields.split(",") if field.strip()]
+
+    if not isinstance(fields, list) or not fields or not all(isinstance(field, str) for field in fields):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"The 'fields' field must be a non-empty list of field names, for example: [\"id\", \"title\", \"price\"]. Available fields: {', '.join(allowed)}."
+        )
+
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}. Available fields: {', '.join(allowed)}."
+        )
+
+    return list(dict.fromkeys(fields))
+
+
+@timed("validate")
+def baseline_validate_flag(value: Any, field: str) -> bool:
+    """The previous `validate_flag`, unchanged."""
+    if value is None:
+        return False
+
+    if isinstance(value, bool):
+        return value
+
+    if isinstance(value, str) and value.lower() in ("true", "false"):
+        return value.lower() == "true"
+
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"The '{field}' field must be true or false. Example: {{\"{field}\": true}}"
+    )
+
+
+def baseline_get_cart(body: Dict[str, Any]) -> Dict[str, Any]:
+    """The previous get_cart route validation, call for call."""
+    baseline_validate_required_field(body, "cartId", '{"cartId": 1}')
+
+    validated_request = GetCartRequest(**body)
+    cart_id = baseline_validate_cart_id(validated_request.cartId)
+    selected_fields = baseline_validate_fields(body.get("fields"), CART_FIELDS)
+    compact = baseline_validate_flag(body.get("compact"), "compact")
+    enrich = baseline_validate_flag(body.get("enrich"), "enrich")
+
+    return {"cartId": cart_id, "fields": selected_fields, "compact": compact, "enrich": enrich}
+
+
+def measure(func: Callable[[], Any], repeat: int) -> float:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def compare(baseline: Callable[[], Any], compiled: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    assert baseline() == compiled()
+
+    baseline_time, compiled_time = measure(baseline, repeat), measure(compiled, repeat)
+
+    return {
+        "baselineUs": round(baseline_time * 1e6, 3),
+        "compiledUs": round(compiled_time * 1e6, 3),
+        "speedup": round(baseline_time / compiled_time, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1,10,100,1000,10000", help="Comma separated product list sizes")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions (the best one is kept)")
+    args = parser.parse_args()
+
+    report: Dict[str, Any] = {"products": {}}
+
+    for size in (int(size) for size in args.sizes.split(",")):
+        # Mixed int and string values, as agents send both
+        products = [
+            {"id": i % 20 + 1, "quantity": str(i % 5 + 1)} if i % 2 else {"id": str(i % 20 + 1)}
+            for i in range(size)
+        ]
+        report["products"][size] = compare(
+            lambda: baseline_validate_products(products), lambda: validate_products(products), args.repeat
+        )
+
+    body = {"cartId": 1, "fields": "id,products", "compact": True}
+    report["getCart"] = compare(lambda: baseline_get_cart(body), lambda: GET_CART_REQUEST.validate(body), args.repeat)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
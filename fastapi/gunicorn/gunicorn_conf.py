@@ -1,4 +1,5 @@
 import multiprocessing
+import os
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -12,6 +13,35 @@ try:
 except ImportError:
     pass
 
+# Shared catalog snapshot, inherited by the workers (see src/utils/snapshot.py).
+# It's rebuilt from upstream on start, so it can live in shared memory.
+os.environ.setdefault("CATALOG_SNAPSHOT_PATH", "/dev/shm/catalog.snapshot")
+# Carts must be shared by the workers, an in-memory store would split them.
+# They (and their pending upstream writes) must also survive a restart, so the
+# SQLite file lives on the persistent volume from docker-compose.prod.yml, not
+# in /dev/shm; set CART_STORE_URL=postgresql://... to use a database instead.
+os.environ.setdefault("CART_STORE_URL", "sqlite:////var/lib/app/carts.sqlite3")
+
+
+def on_starting(server):
+    # Fill the snapshot before forking so every worker starts with a warm catalog.
+    # Only the config and the snapshot module are imported: the services would
+    # create their metrics in the master process.
+    import httpx
+
+    from src.config import settings as app_settings
+    from src.utils import snapshot
+
+    try:
+        count = snapshot.prefill_snapshot(
+            app_settings.CATALOG_SNAPSHOT_PATH,
+            app_settings.UPSTREAM_BASE_URL,
+            httpx.Timeout(app_settings.UPSTREAM_READ_TIMEOUT, connect=app_settings.UPSTREAM_CONNECT_TIMEOUT),
+        )
+        server.log.info(f"Catalog snapshot written with {count} products")
+    except Exception as e:
+        server.log.warning(f"Catalog snapshot not prefilled, workers will fetch it: {e!r}")
+
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
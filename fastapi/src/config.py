@@ -23,6 +23,93 @@ class Config(CustomBaseSettings):
 
     APP_VERSION: str = "0.1"
 
+    # Upstream (fakestoreapi.com) HTTP client
+    UPSTREAM_BASE_URL: str = "https://fakestoreapi.com"
+    UPSTREAM_MAX_CONNECTIONS: int = 100
+    UPSTREAM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    UPSTREAM_KEEPALIVE_EXPIRY: float = 30.0
+    UPSTREAM_CONNECT_TIMEOUT: float = 5.0
+    UPSTREAM_READ_TIMEOUT: float = 10.0
+    UPSTREAM_POOL_TIMEOUT: float = 5.0
+    UPSTREAM_HTTP2: bool = True
+    # Share one in-flight call between concurrent identical GETs
+    UPSTREAM_COALESCE_REQUESTS: bool = True
+    # Max concurrent upstream fetches for a single batch operation
+    UPSTREAM_BATCH_CONCURRENCY: int = 8
+    # Jittered retries of idempotent calls, capped by a global retry budget
+    UPSTREAM_RETRY_ATTEMPTS: int = 2
+    UPSTREAM_RETRY_BACKOFF_SECONDS: float = 0.1
+    UPSTREAM_RETRY_MAX_BACKOFF_SECONDS: float = 1.0
+    UPSTREAM_RETRY_BUDGET_RATIO: float = 0.1
+    UPSTREAM_RETRY_BUDGET_MIN_PER_SECOND: float = 1.0
+    # Per-endpoint circuit breakers
+    UPSTREAM_BREAKER_FAILURE_THRESHOLD: int = 5
+    UPSTREAM_BREAKER_RESET_SECONDS: float = 30.0
+    # Send a second idempotent call when the first is slower than the endpoint's p95
+    UPSTREAM_HEDGE_ENABLED: bool = False
+    UPSTREAM_HEDGE_PERCENTILE: float = 0.95
+
+    # Product catalog cache
+    PRODUCT_CACHE_ENABLED: bool = True
+    PRODUCT_CACHE_TTL_SECONDS: float = 300.0
+    PRODUCT_CACHE_STALE_TTL_SECONDS: float = 3600.0
+    PRODUCT_CACHE_MAX_ENTRIES: int = 1024
+    # Encoded catalog and product responses (one per projection), reused while the records stay cached
+    PRODUCT_PAYLOAD_CACHE_MAX_ENTRIES: int = 256
+    # Cache-Control max-age of product reads; 0 sends no-cache (clients revalidate with the ETag)
+    PRODUCT_HTTP_MAX_AGE_SECONDS: int = 60
+    # Catalog snapshot shared by all workers (set by gunicorn/gunicorn_conf.py)
+    CATALOG_SNAPSHOT_PATH: str | None = None
+
+    # Local cart store: memory://, sqlite:///<path> or postgresql://... (empty to disable)
+    CART_STORE_URL: str | None = "memory://"
+    # Local cart ids start above the upstream ones
+    CART_STORE_FIRST_LOCAL_ID: int = 1000
+    CART_STORE_POOL_SIZE: int = 10
+    # Mirror local cart writes to upstream
+    CART_MIRROR_UPSTREAM: bool = True
+    # Acknowledge cart writes once stored locally and flush them upstream from a
+    # background queue; False waits for upstream (write-through)
+    CART_WRITE_BEHIND: bool = True
+    CART_WRITE_BEHIND_MAX_PENDING: int = 1000
+    CART_WRITE_BEHIND_CONCURRENCY: int = 4
+    CART_WRITE_BEHIND_MAX_ATTEMPTS: int = 3
+    CART_WRITE_BEHIND_ENQUEUE_TIMEOUT: float = 5.0
+    # Time given to pending upstream writes on shutdown
+    CART_MIRROR_DRAIN_SECONDS: float = 10.0
+
+    # Server-Timing instrumentation: fraction (0-1) of requests to time
+    SERVER_TIMING_SAMPLE_RATE: float = 0.0
+    SERVER_TIMING_LOG: bool = False
+
+    # Compact response mode
+    COMPACT_DESCRIPTION_LENGTH: int = 120
+
+    # Response compression (gzip, plus br and zstd when brotli/zstandard are installed)
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+
+    # Records encoded per chunk by /products/stream
+    STREAM_CHUNK_SIZE: int = 100
+
+    # Warm-up in the lifespan, readiness answers 503 until it's done
+    WARMUP_ENABLED: bool = True
+    WARMUP_TIMEOUT_SECONDS: float = 30.0
+
+    # Readiness thresholds (/healthcheck/ready answers 503 past them)
+    READINESS_MAX_POOL_SATURATION: float = 0.9
+    READINESS_MAX_UPSTREAM_FAILURES: int = 5
+    READINESS_MAX_LOOP_LAG_SECONDS: float = 0.5
+
+    # Event loop lag monitor: logs the loop thread's stack when it's blocked
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_SECONDS: float = 0.05
+    LOOP_MONITOR_THRESHOLD_SECONDS: float = 0.1
+
+    # Sampling profiler at /debug/profile, served only when a token is set
+    PROFILER_TOKEN: str | None = None
+    PROFILER_MAX_SECONDS: float = 60.0
+
     @model_validator(mode="after")
     def validate_sentry_non_local(self) -> "Config":
         if self.ENVIRONMENT.is_deployed and not self.SENTRY_DSN:
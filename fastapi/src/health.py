@@ -0,0 +1,64 @@
+"""Liveness and readiness checks.
+
+Liveness only proves the event loop answers. Readiness tells the load
+balancer whether this worker should get traffic, and is computed from
+counters the app already keeps, so probes never do I/O:
+
+- warmup: the warm-up in the lifespan has finished
+- upstream: pool saturation (in-flight calls vs max connections), circuit
+  breaker states and consecutive upstream failures
+- cache: age of the cached catalog; a cold cache only fails readiness when
+  the upstream is failing too, since the catalog can't be loaded then
+- loop: last measured event loop lag
+"""
+
+from typing import Any, Dict, Tuple
+
+from src import warmup
+from src.config import settings
+from src.services import product as product_service, upstream
+from src.utils.loop_monitor import LoopLagMonitor
+from src.utils.resilience import CLOSED, OPEN
+
+
+def liveness() -> Dict[str, Any]:
+    return {"status": "ok"}
+
+
+def readiness(loop_monitor: LoopLagMonitor) -> Tuple[bool, Dict[str, Any]]:
+    """Return whether the worker is ready and the state of every check."""
+    pool = upstream.get_pool_stats()
+    circuits = upstream.get_circuit_states()
+    open_circuits = sorted(endpoint for endpoint, state in circuits.items() if state != CLOSED)
+    upstream_failing = (
+        any(state == OPEN for state in circuits.values())
+        or pool["consecutiveFailures"] >= settings.READINESS_MAX_UPSTREAM_FAILURES
+    )
+
+    catalog_age = product_service.get_catalog_age()
+    cache_cold = product_service.product_cache.enabled and catalog_age is None
+
+    loop = loop_monitor.snapshot()
+
+    checks = {
+        "warmup": {"ok": warmup.state.ready, "steps": warmup.state.snapshot()["steps"]},
+        "upstream": {
+            "ok": pool["saturation"] < settings.READINESS_MAX_POOL_SATURATION,
+            "state": "failing" if upstream_failing else "ok",
+            "openCircuits": open_circuits,
+            **pool,
+        },
+        "cache": {
+            "ok": not (cache_cold and upstream_failing),
+            "state": "cold" if cache_cold else "warm",
+            "catalogAgeSeconds": round(catalog_age, 1) if catalog_age is not None else None,
+        },
+        "loop": {
+            "ok": not loop["running"] or loop["lastLagMs"] < settings.READINESS_MAX_LOOP_LAG_SECONDS * 1000,
+            "lastLagMs": loop["lastLagMs"],
+            "maxLagMs": loop["maxLagMs"],
+        },
+    }
+    ready = all(check["ok"] for check in checks.values())
+
+    return ready, {"status": "ok" if ready else "unavailable", "checks": checks}
@@ -1,23 +1,47 @@
+import asyncio
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 import sentry_sdk
 from starlette.middleware.cors import CORSMiddleware
 from fastapi_mcp import FastApiMCP
 
-from src.routes import cart, product
+from src import health, metrics, warmup
+from src.middleware.compression import CompressionMiddleware
+from src.middleware.timing import ServerTimingMiddleware
+from src.routes import cart, debug, product
+from src.services import cart as cart_service, product as product_service, upstream
 from src.config import app_configs, settings
+from src.utils.loop_monitor import LoopLagMonitor
+from src.utils.responses import JSONResponse, conditional_response
+
+loop_monitor = LoopLagMonitor(
+    interval=settings.LOOP_MONITOR_INTERVAL_SECONDS,
+    threshold=settings.LOOP_MONITOR_THRESHOLD_SECONDS,
+)
 
 
 @asynccontextmanager
-async def lifespan(_application: FastAPI) -> AsyncGenerator:
+async def lifespan(application: FastAPI) -> AsyncGenerator:
     # Startup
+    await upstream.start_client()
+    await cart_service.start_store()
+    product_service.load_catalog_snapshot()
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    warmup_task = asyncio.create_task(warmup.warm_up(application))
+
     yield
+
     # Shutdown
+    warmup_task.cancel()
+    await loop_monitor.stop()
+    await cart_service.close_store()
+    await upstream.close_client()
 
 
-app = FastAPI(**app_configs, lifespan=lifespan)
+app = FastAPI(**app_configs, default_response_class=JSONResponse, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -28,15 +52,37 @@ app.add_middleware(
     allow_headers=settings.CORS_HEADERS,
 )
 
+if settings.SERVER_TIMING_SAMPLE_RATE > 0:
+    app.add_middleware(
+        ServerTimingMiddleware,
+        sample_rate=settings.SERVER_TIMING_SAMPLE_RATE,
+        log=settings.SERVER_TIMING_LOG,
+    )
+
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+
+if app.openapi_url:
+    # Replaces FastAPI's own route, which serializes the schema on every request
+    app.router.routes = [route for route in app.router.routes if getattr(route, "path", None) != app.openapi_url]
+
+    @app.get(app.openapi_url, include_in_schema=False)
+    async def openapi_schema(request: Request) -> Response:
+        return conditional_response(request, warmup.openapi_payload(app))
+
+
 app.include_router(cart.router)
 app.include_router(product.router)
+app.include_router(debug.router)
 
 
 mcp = FastApiMCP(
     app,
     name="Store MCP",
     describe_all_responses=False,
-    describe_full_response_schema=False
+    describe_full_response_schema=False,
+    # HTTP-client variants of the product reads; tools get the regular ones
+    exclude_operations=["stream_products", "get_product_by_id"],
 )
 
 mcp.mount()
@@ -48,6 +94,31 @@ if settings.ENVIRONMENT.is_deployed:
     )
 
 
+@app.get("/healthcheck/live", include_in_schema=False)
+async def liveness() -> dict[str, str]:
+    return health.liveness()
+
+
+@app.get("/healthcheck/ready", include_in_schema=False)
 @app.get("/healthcheck", include_in_schema=False)
-async def healthcheck() -> dict[str, str]:
-    return {"status": "ok"}
+async def readiness() -> JSONResponse:
+    ready, report = health.readiness(loop_monitor)
+
+    return JSONResponse(content=report, status_code=200 if ready else 503)
+
+
+@app.get("/cache/stats", include_in_schema=False)
+async def cache_stats() -> dict[str, dict | None]:
+    return {
+        "products": product_service.get_cache_stats(),
+        "upstreamSingleFlight": upstream.get_singleflight_stats(),
+        "upstreamResilience": upstream.get_resilience_stats(),
+        "cartWrites": cart_service.get_write_queue_stats(),
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics() -> Response:
+    payload, content_type = metrics.render_latest()
+
+    return Response(content=payload, media_type=content_type)
@@ -0,0 +1,154 @@
+"""Prometheus metrics.
+
+Usage:
+    from src import metrics
+    metrics.observe_route("get cart", 200, elapsed)
+
+`prometheus-client` is only installed with the `prod` dependency group, so
+every recorder here is a no-op when it's missing. Under gunicorn the
+`PROMETHEUS_MULTIPROC_DIR` environment variable switches `/metrics` to
+multiprocess collection, aggregating every worker (see
+`gunicorn/gunicorn_conf.py`, which marks dead workers).
+
+Cache hit ratio is derived from `app_cache_lookups_total`, e.g.:
+    sum(rate(app_cache_lookups_total{result!="miss"}[5m]))
+      / sum(rate(app_cache_lookups_total[5m]))
+"""
+
+import os
+import re
+from typing import Any, Tuple
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        REGISTRY,
+        CollectorRegistry,
+        Counter,
+        Gauge,
+        Histogram,
+        generate_latest,
+        multiprocess,
+    )
+
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# "/products/5" -> "/products/{id}"
+_ID_SEGMENT_RE = re.compile(r"^(/[^/]+)/[^/]+")
+
+
+class _NoopMetric:
+    def labels(self, *_args: Any, **_kwargs: Any) -> "_NoopMetric":
+        return self
+
+    def observe(self, *_args: Any) -> None:
+        pass
+
+    def inc(self, *_args: Any) -> None:
+        pass
+
+    def dec(self, *_args: Any) -> None:
+        pass
+
+
+if PROMETHEUS_AVAILABLE:
+    ROUTE_LATENCY = Histogram(
+        "app_operation_duration_seconds",
+        "Route handler latency by operation and response status",
+        ("operation", "status"),
+    )
+    ROUTE_IN_FLIGHT = Gauge(
+        "app_operations_in_flight",
+        "Route handlers currently running",
+        ("operation",),
+        multiprocess_mode="livesum",
+    )
+    UPSTREAM_LATENCY = Histogram(
+        "app_upstream_request_duration_seconds",
+        "Upstream (fakestoreapi.com) call latency by endpoint and status",
+        ("method", "endpoint", "status"),
+    )
+    UPSTREAM_IN_FLIGHT = Gauge(
+        "app_upstream_requests_in_flight",
+        "Upstream calls currently waiting for a response",
+        multiprocess_mode="livesum",
+    )
+    UPSTREAM_DEDUPLICATED = Counter(
+        "app_upstream_deduplicated_total",
+        "Upstream calls served by an identical in-flight call",
+        ("flight",),
+    )
+    UPSTREAM_RESILIENCE_EVENTS = Counter(
+        "app_upstream_resilience_events_total",
+        "Upstream retries, hedges and circuit breaker events by endpoint",
+        ("endpoint", "event"),
+    )
+    WRITE_BEHIND_WRITES = Counter(
+        "app_write_behind_writes_total",
+        "Write-behind queue writes by queue and outcome (sent, coalesced, retried, superseded, dropped)",
+        ("queue", "outcome"),
+    )
+    CACHE_LOOKUPS = Counter(
+        "app_cache_lookups_total",
+        "Cache lookups by cache and result (hit, stale, miss, fallback)",
+        ("cache", "result"),
+    )
+    CACHE_REFRESHES = Counter(
+        "app_cache_refreshes_total",
+        "Background cache refreshes by cache and outcome",
+        ("cache", "outcome"),
+    )
+else:
+    ROUTE_LATENCY = ROUTE_IN_FLIGHT = UPSTREAM_LATENCY = UPSTREAM_IN_FLIGHT = _NoopMetric()
+    UPSTREAM_DEDUPLICATED = UPSTREAM_RESILIENCE_EVENTS = WRITE_BEHIND_WRITES = _NoopMetric()
+    CACHE_LOOKUPS = CACHE_REFRESHES = _NoopMetric()
+
+
+def endpoint_template(path: str) -> str:
+    """Collapse resource ids in a path to keep label cardinality bounded."""
+    return _ID_SEGMENT_RE.sub(r"\1/{id}", path.split("?", 1)[0])
+
+
+def observe_route(operation: str, status: int, elapsed: float) -> None:
+    ROUTE_LATENCY.labels(operation, str(status)).observe(elapsed)
+
+
+def observe_upstream(method: str, path: str, status: int | str, elapsed: float) -> None:
+    UPSTREAM_LATENCY.labels(method, endpoint_template(path), str(status)).observe(elapsed)
+
+
+def record_resilience_event(endpoint: str, event: str) -> None:
+    UPSTREAM_RESILIENCE_EVENTS.labels(endpoint, event).inc()
+
+
+def record_write_behind(queue: str, outcome: str) -> None:
+    WRITE_BEHIND_WRITES.labels(queue, outcome).inc()
+
+
+def record_cache_lookup(cache: str, result: str) -> None:
+    CACHE_LOOKUPS.labels(cache, result).inc()
+
+
+def record_cache_refresh(cache: str, outcome: str) -> None:
+    CACHE_REFRESHES.labels(cache, outcome).inc()
+
+
+def record_deduplicated(flight: str) -> None:
+    UPSTREAM_DEDUPLICATED.labels(flight).inc()
+
+
+def render_latest() -> Tuple[bytes, str]:
+    """Return the exposition payload and its content type."""
+    if not PROMETHEUS_AVAILABLE:
+        return b"# prometheus-client is not installed\n", CONTENT_TYPE_LATEST
+
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,115 @@
+from typing import Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.utils.compression import StreamCompressor, negotiate
+
+# Compressed when the response's media type starts with one of these
+COMPRESSIBLE_TYPES: Tuple[str, ...] = (
+    "application/json",
+    "application/x-ndjson",
+    "application/problem+json",
+    "text/",
+)
+
+
+class CompressionMiddleware:
+    """Compress responses with the best encoding the client accepts (zstd, br, gzip).
+
+    - Whole bodies under `minimum_size` bytes are sent as is.
+    - Streamed bodies (NDJSON, MCP SSE frames) are compressed chunk by chunk
+      and flushed after every chunk, so each event reaches the client when
+      it's sent.
+    - Responses that already have a Content-Encoding (e.g. cached payloads
+      stored compressed, see `src.utils.responses`) are passed through.
+
+    Args:
+        app: The wrapped ASGI application
+        minimum_size: Smallest whole body worth compressing, in bytes
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressingResponder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(self, send: Send, encoding: str, minimum_size: int) -> None:
+        self._send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+
+        self._start: Message | None = None
+        self._compressor: StreamCompressor | None = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            media_type = headers.get("content-type", "")
+            self._passthrough = (
+                "content-encoding" in headers
+                or message["status"] in (204, 304)
+                or not media_type.startswith(COMPRESSIBLE_TYPES)
+            )
+            if self._passthrough:
+                await self._send(message)
+            else:
+                # Held until the first body chunk tells whether it's streamed
+                self._start = message
+            return
+
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._start is not None:
+            start, self._start = self._start, None
+
+            if not more_body and len(body) < self.minimum_size:
+                self._passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+
+            self._compressor = StreamCompressor(self.encoding)
+            headers = MutableHeaders(scope=start)
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if "etag" in headers and not headers["etag"].startswith("W/"):
+                # The compressed bytes differ from what a strong ETag describes
+                headers["ETag"] = "W/" + headers["etag"]
+
+            if not more_body:
+                body = self._compressor.compress(body, flush=False) + self._compressor.finish()
+                headers["Content-Length"] = str(len(body))
+                await self._send(start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+
+            del headers["Content-Length"]
+            await self._send(start)
+
+        if more_body:
+            data = self._compressor.compress(body)
+        else:
+            data = self._compressor.compress(body, flush=False) + self._compressor.finish()
+
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
@@ -0,0 +1,59 @@
+import json
+import random
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.logger import get_logger
+from src.utils.timing import start_recording, stop_recording
+
+logger = get_logger(__name__)
+
+
+class ServerTimingMiddleware:
+    """Emit per-phase durations of sampled requests as a Server-Timing header.
+
+    Args:
+        app: The wrapped ASGI application
+        sample_rate: Fraction (0-1) of requests to instrument
+        log: Also log the durations as a structured (JSON) line
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 1.0, log: bool = False) -> None:
+        self.app = app
+        self.sample_rate = sample_rate
+        self.log = log
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        recorder, token = start_recording()
+        status_code = None
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", recorder.header_value())
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            stop_recording(token)
+
+            if self.log:
+                durations = {name: round(total * 1000, 3) for name, (total, _) in recorder.totals().items()}
+                durations["total"] = round((time.perf_counter() - recorder.started) * 1000, 3)
+                logger.info(json.dumps({
+                    "event": "request_timing",
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                    "durationsMs": durations,
+                }))
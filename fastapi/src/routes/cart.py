@@ -1,11 +1,16 @@
-from typing import List
 from fastapi import APIRouter, Request, status
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
 from src.services import cart as cart_service
 from src.logger import get_logger
-from src.utils.exceptions import handle_route_errors, validate_required_field
-from src.validation.cart import validate_cart_id, validate_products
+from src.utils.exceptions import handle_route_errors
+from src.utils.responses import JSONResponse
+from src.utils.projection import project_cart
+from src.validation.cart import (
+    ADD_TO_CART_REQUEST,
+    GET_CART_REQUEST,
+    MANAGE_CART_REQUEST,
+    REMOVE_FROM_CART_REQUEST,
+    SET_QUANTITY_REQUEST,
+)
 from src.validation.common import parse_request_body
 from src.middleware.auth import extract_user_id_from_request
 
@@ -14,48 +19,27 @@ logger = get_logger(__name__)
 router = APIRouter(prefix="/carts", tags=["Carts"])
 
 
-class CartProduct(BaseModel):
-    """Product item in a cart"""
-    id: int
-    quantity: int = 1
-
-
-class GetCartRequest(BaseModel):
-    """Request schema for getting a cart"""
-    cartId: int | str
-
-
-class ManageCartRequest(BaseModel):
-    """Request schema for creating or updating a cart"""
-    products: List[CartProduct]
-    cartId: int | str | None = None
-
-
-class DeleteCartRequest(BaseModel):
-    """Request schema for deleting a cart"""
-    cartId: int | str
-
-
 @router.post(
     "/get-cart",
     operation_id="get_cart",
     summary="Get a single cart",
-    description="Retrieve details of a specific cart by ID. Example: {\"cartId\": 1}"
+    description="Retrieve details of a specific cart by ID. Pass enrich=true to include each product's details, line totals and the cart subtotal in the same response. Optionally pass fields to return only some cart fields and compact to drop images, internal fields and shorten descriptions. Example: {\"cartId\": 1, \"enrich\": true, \"compact\": true}"
 )
 @handle_route_errors("get cart")
 async def get_cart(request: Request):
     # Ensure authentication
-    extract_user_id_from_request(request)
+    user_id = extract_user_id_from_request(request)
 
     body = await parse_request_body(request)
-    validate_required_field(body, "cartId", '{"cartId": 1}')
-
-    validated_request = GetCartRequest(**body)
-    cart_id = validate_cart_id(validated_request.cartId)
+    values = GET_CART_REQUEST.validate(body)
+    cart_id = values["cartId"]
 
-    cart = await cart_service.get_cart(cart_id)
+    if values["enrich"]:
+        cart = await cart_service.get_enriched_cart(cart_id, user_id)
+    else:
+        cart = await cart_service.get_cart(cart_id, user_id)
 
-    return JSONResponse(content=cart)
+    return JSONResponse(content=project_cart(cart, values["fields"], values["compact"]))
 
 
 @router.post(
@@ -70,32 +54,98 @@ async def manage_cart(request: Request):
     user_id = extract_user_id_from_request(request)
 
     body = await parse_request_body(request)
-    validate_required_field(
-        body, "products", '{"products": [{"id": 1, "quantity": 2}]}')
-
-    # Use manual validation for products to get detailed error messages
-    products = validate_products(body.get("products", []))
-    cart_id = body.get("cartId")
+    values = MANAGE_CART_REQUEST.validate(body)
+    cart_id = values["cartId"]
 
     cart_data = {
         "userId": user_id,
-        "products": products
+        "products": values["products"]
     }
 
     if cart_id:
-        validated_cart_id = validate_cart_id(cart_id)
-
-        updated_cart = await cart_service.update_cart(validated_cart_id, cart_data)
+        updated_cart = await cart_service.update_cart(cart_id, cart_data)
 
         return JSONResponse(content=updated_cart)
     else:
         new_cart = await cart_service.create_cart(cart_data)
 
-        # manually modify the cart id as the fakestoreapi.com returns id 11 by default
-        # which contains an empty cart.
-        new_cart['id'] = 1
+        if not cart_service.store_enabled():
+            # manually modify the cart id as the fakestoreapi.com returns id 11 by default
+            # which contains an empty cart.
+            new_cart['id'] = 1
 
         return JSONResponse(
             content=new_cart,
             status_code=status.HTTP_201_CREATED
         )
+
+
+@router.post(
+    "/add-to-cart",
+    operation_id="add_to_cart",
+    summary="Add products to a cart",
+    description="Add products to a cart without sending the whole cart: quantities are added to the products already in it, and repeated product IDs are merged. quantity defaults to 1. If no cartId is provided, creates a new cart with these products. Returns the updated cart. Example: {\"cartId\": 1, \"products\": [{\"id\": 5, \"quantity\": 2}]}"
+)
+@handle_route_errors("add to cart", resource="cart")
+async def add_to_cart(request: Request):
+    user_id = extract_user_id_from_request(request)
+
+    body = await parse_request_body(request)
+    values = ADD_TO_CART_REQUEST.validate(body)
+    changes = [(product["id"], product.get("quantity", 1)) for product in values["products"]]
+    cart_id = values["cartId"]
+
+    if not cart_id:
+        # Merge repeated IDs before creating the cart
+        quantities: dict[int, int] = {}
+        for product_id, quantity in changes:
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+
+        new_cart = await cart_service.create_cart({
+            "userId": user_id,
+            "products": [{"id": product_id, "quantity": quantity} for product_id, quantity in quantities.items()],
+        })
+
+        return JSONResponse(content=new_cart, status_code=status.HTTP_201_CREATED)
+
+    cart = await cart_service.add_to_cart(cart_id, user_id, changes)
+
+    return JSONResponse(content=cart)
+
+
+@router.post(
+    "/remove-from-cart",
+    operation_id="remove_from_cart",
+    summary="Remove products from a cart",
+    description="Remove products from a cart by product ID, whatever their quantity. IDs that aren't in the cart are ignored. Returns the updated cart. Example: {\"cartId\": 1, \"productIds\": [5, 7]}"
+)
+@handle_route_errors("remove from cart", resource="cart")
+async def remove_from_cart(request: Request):
+    user_id = extract_user_id_from_request(request)
+
+    body = await parse_request_body(request)
+    values = REMOVE_FROM_CART_REQUEST.validate(body)
+
+    cart = await cart_service.remove_from_cart(values["cartId"], user_id, values["productIds"])
+
+    return JSONResponse(content=cart)
+
+
+@router.post(
+    "/set-quantity",
+    operation_id="set_quantity",
+    summary="Set product quantities in a cart",
+    description="Set the quantity of one or more products in a cart, adding them if they aren't in it yet. A quantity of 0 removes the product. Other products are left untouched. Returns the updated cart. Example: {\"cartId\": 1, \"products\": [{\"id\": 5, \"quantity\": 3}, {\"id\": 7, \"quantity\": 0}]}"
+)
+@handle_route_errors("set quantity", resource="cart")
+async def set_quantity(request: Request):
+    user_id = extract_user_id_from_request(request)
+
+    body = await parse_request_body(request)
+    values = SET_QUANTITY_REQUEST.validate(body)
+
+    cart = await cart_service.set_quantities(
+        values["cartId"], user_id, [(product["id"], product["quantity"]) for product in values["products"]]
+    )
+
+    return JSONResponse(content=cart)
@@ -0,0 +1,79 @@
+import asyncio
+import os
+import secrets
+import time
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+
+from src.config import settings
+from src.logger import get_logger
+from src.utils.profiler import render_collapsed, sample_stacks
+
+logger = get_logger(__name__)
+
+router = APIRouter(prefix="/debug", tags=["Debug"], include_in_schema=False)
+
+# One profile at a time per worker: sampling is cheap but not free
+_profile_lock = asyncio.Lock()
+
+
+def verify_debug_token(request: Request) -> None:
+    """
+    Check the X-Debug-Token header against PROFILER_TOKEN.
+
+    Raises:
+        HTTPException: 404 when the profiler is disabled, 401 on a missing or wrong token
+    """
+    if not settings.PROFILER_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    token = request.headers.get("X-Debug-Token", "")
+    if not secrets.compare_digest(token.encode(), settings.PROFILER_TOKEN.encode()):
+        logger.warning("Rejected profiler request with an invalid debug token")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="A valid X-Debug-Token header is required."
+        )
+
+
+@router.get("/profile")
+async def profile(
+    request: Request,
+    seconds: float = Query(10.0, gt=0),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+) -> Response:
+    """
+    Sample every thread of this worker (event loop included) for `seconds`
+    and return the collapsed stacks, ready for speedscope or flamegraph.pl.
+    The `X-Worker-Pid` header tells which gunicorn worker answered.
+    """
+    verify_debug_token(request)
+
+    if seconds > settings.PROFILER_MAX_SECONDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Profile duration must be at most {settings.PROFILER_MAX_SECONDS:g} seconds."
+        )
+
+    if _profile_lock.locked():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profile is already running on this worker."
+        )
+
+    async with _profile_lock:
+        pid = os.getpid()
+        logger.info(f"Profiling worker {pid} for {seconds:g}s every {interval_ms:g}ms")
+
+        samples = await asyncio.to_thread(sample_stacks, seconds, interval_ms / 1000)
+
+    filename = f"profile-{pid}-{int(time.time())}.folded"
+
+    return Response(
+        content=render_collapsed(samples),
+        media_type="text/plain; charset=utf-8",
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Worker-Pid": str(pid),
+        },
+    )
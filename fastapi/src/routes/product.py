@@ -3,53 +3,168 @@
 This module contains all the API endpoints for product operations.
 """
 
-from fastapi import APIRouter, Request
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from typing import Dict, List, Literal, Tuple
 
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import Response, StreamingResponse
+
+from src.config import settings
 from src.services import product as product_service
 from src.logger import get_logger
-from src.utils.exceptions import handle_route_errors, validate_required_field
-from src.validation.product import validate_product_id
-from src.validation.common import parse_request_body
+from src.utils.exceptions import handle_route_errors
+from src.utils.responses import JSONResponse, cache_control, conditional_response
+from src.utils.projection import PRODUCT_FIELDS, project_product, project_products
+from src.utils.streaming import NDJSON_MEDIA_TYPE, iter_json_array, iter_ndjson
+from src.validation.product import (
+    GET_PRODUCT_REQUEST,
+    GET_PRODUCTS_REQUEST,
+    validate_product_path_id,
+    validate_search_request,
+)
+from src.validation.common import parse_request_body, validate_fields
 
 logger = get_logger(__name__)
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
 
-class GetProductRequest(BaseModel):
-    """Request schema for getting a single product"""
-    id: int | str
+def _projection_key(fields: List[str] | None) -> Tuple[str, ...] | None:
+    return tuple(fields) if fields is not None else None
+
+
+def _cache_headers() -> Dict[str, str]:
+    return {"Cache-Control": cache_control(settings.PRODUCT_HTTP_MAX_AGE_SECONDS)}
 
 
 @router.get(
     "",
     operation_id="get_all_products",
     summary="Get all products",
-    description="Retrieve all available products from the store",
+    description="Retrieve all available products from the store. Use fields (comma separated, e.g. \"id,title,price\") to return only some fields, and compact=true to drop images and shorten descriptions.",
 )
 @handle_route_errors("get all products")
-async def get_all_products():
+async def get_all_products(
+    request: Request,
+    fields: str | None = Query(None, description=f"Comma separated fields to return. Available: {','.join(PRODUCT_FIELDS)}"),
+    compact: bool = Query(False, description="Drop images and shorten descriptions"),
+):
+    selected_fields = validate_fields(fields, PRODUCT_FIELDS)
+
     products = await product_service.get_all_products()
 
-    return JSONResponse(content=products)
+    payload = product_service.encode_cached(
+        ("all", _projection_key(selected_fields), compact),
+        products,
+        lambda: project_products(products, selected_fields, compact),
+    )
+
+    return conditional_response(request, payload, _cache_headers())
+
+
+@router.get(
+    "/stream",
+    operation_id="stream_products",
+    summary="Stream all products",
+    description="Stream the whole catalog as NDJSON (one product per line, default) or as a chunked JSON array (format=json). Records are encoded incrementally, so memory stays bounded and the first products arrive right away. Accepts fields and compact like get_all_products. Not exposed as an MCP tool.",
+)
+@handle_route_errors("stream products")
+async def stream_products(
+    format: Literal["ndjson", "json"] = Query("ndjson", description="ndjson (one product per line) or json (array)"),
+    fields: str | None = Query(None, description=f"Comma separated fields to return. Available: {','.join(PRODUCT_FIELDS)}"),
+    compact: bool = Query(False, description="Drop images and shorten descriptions"),
+):
+    selected_fields = validate_fields(fields, PRODUCT_FIELDS)
+
+    # Loaded before the response starts, so upstream errors still get a proper status
+    products = await product_service.get_all_products()
+
+    # Projected lazily, one record at a time, as the chunks are encoded
+    records = (project_product(product, selected_fields, compact) for product in products)
+
+    if format == "json":
+        return StreamingResponse(
+            iter_json_array(records, settings.STREAM_CHUNK_SIZE), media_type="application/json", headers=_cache_headers()
+        )
+
+    return StreamingResponse(
+        iter_ndjson(records, settings.STREAM_CHUNK_SIZE), media_type=NDJSON_MEDIA_TYPE, headers=_cache_headers()
+    )
 
 
 @router.post(
     "/single-product",
     operation_id="get_product",
     summary="Get a single product",
-    description="Retrieve details of a specific product by ID. Example: {\"id\": 1}"
+    description="Retrieve details of a specific product by ID. Optionally pass fields to return only some fields and compact to drop the image and shorten the description. Example: {\"id\": 1, \"fields\": [\"id\", \"title\", \"price\"], \"compact\": true}"
 )
 @handle_route_errors("get product")
 async def get_product(request: Request):
     body = await parse_request_body(request)
-    validate_required_field(body, "id", '{"id": 1}')
+    values = GET_PRODUCT_REQUEST.validate(body)
 
-    validated_request = GetProductRequest(**body)
-    product_id = validate_product_id(validated_request.id)
+    return await _product_response(request, values["id"], values["fields"], values["compact"])
 
+
+@router.get(
+    "/{product_id}",
+    operation_id="get_product_by_id",
+    summary="Get a single product (cacheable)",
+    description="GET variant of get_product for HTTP clients and caches: sends an ETag and Cache-Control, and answers If-None-Match with 304 Not Modified. Accepts fields and compact like get_all_products. Not exposed as an MCP tool.",
+)
+@handle_route_errors("get product")
+async def get_product_by_id(
+    request: Request,
+    product_id: str,
+    fields: str | None = Query(None, description=f"Comma separated fields to return. Available: {','.join(PRODUCT_FIELDS)}"),
+    compact: bool = Query(False, description="Drop images and shorten descriptions"),
+):
+    product_id = validate_product_path_id(product_id)
+    selected_fields = validate_fields(fields, PRODUCT_FIELDS)
+
+    return await _product_response(request, product_id, selected_fields, compact)
+
+
+async def _product_response(
+    request: Request, product_id: int | str, selected_fields: List[str] | None, compact: bool
+) -> Response:
     product = await product_service.get_product(product_id)
 
-    return JSONResponse(content=product)
+    payload = product_service.encode_cached(
+        ("product", str(product_id), _projection_key(selected_fields), compact),
+        product,
+        lambda: project_product(product, selected_fields, compact),
+    )
+
+    return conditional_response(request, payload, _cache_headers())
+
+
+@router.post(
+    "/batch",
+    operation_id="get_products",
+    summary="Get several products",
+    description="Retrieve details of several products by ID in one call, e.g. every product in a cart. Results keep the requested order, with one entry per requested ID (repeated IDs are repeated); unknown IDs come back as {\"id\": 99, \"found\": false}. Optionally pass fields and compact like get_product. Example: {\"ids\": [1, 2, 3], \"compact\": true}"
+)
+@handle_route_errors("get products")
+async def get_products(request: Request):
+    body = await parse_request_body(request)
+    values = GET_PRODUCTS_REQUEST.validate(body)
+
+    products = await product_service.get_products(values["ids"])
+
+    return JSONResponse(content=project_products(products, values["fields"], values["compact"]))
+
+
+@router.post(
+    "/search",
+    operation_id="search_products",
+    summary="Search products",
+    description="Search the catalog by text, category, price range and minimum rating, with sorting and pagination. All fields are optional. sort is one of: relevance, price_asc, price_desc, rating, title. limit is 1-50 (default 10); pass the returned nextCursor as cursor to get the next page. Example: {\"query\": \"cotton jacket\", \"category\": \"men's clothing\", \"minPrice\": 10, \"maxPrice\": 100, \"minRating\": 3.5, \"sort\": \"price_asc\", \"limit\": 5}"
+)
+@handle_route_errors("search products")
+async def search_products(request: Request):
+    body = await parse_request_body(request)
+    criteria = validate_search_request(body)
+
+    results = await product_service.search_products(**criteria)
+
+    return JSONResponse(content=results)
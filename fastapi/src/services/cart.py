@@ -2,20 +2,90 @@
 
 Handles interaction with the fakestoreapi.com cart endpoints.
 This service strictly follows the fakestoreapi.com API specification.
+
+fakestoreapi.com doesn't persist carts, so with `CART_STORE_URL` set carts
+are kept in a local store (see `src.services.cart_store`), keyed by user id
+and cart id: reads are served from it (falling back to upstream for carts it
+doesn't know), and writes are stored first, then mirrored to upstream. In
+write-behind mode (`CART_WRITE_BEHIND`) writes are acknowledged once stored,
+along with their upstream write in the store's outbox, and mirrored by a
+background queue (see `src.utils.write_behind`), which coalesces consecutive
+updates of a cart and recovers the outbox of a process that crashed.
+Otherwise they wait for upstream, but a failed upstream write is only
+logged since the local one is kept.
 """
 
-import requests
-from typing import Dict, Any, Union
+import asyncio
+import httpx
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from fastapi import HTTPException, status
+from typing import AsyncIterator, Callable, Dict, Any, Iterable, List, Tuple, Union
+from src.config import settings
 from src.logger import get_logger
+from src.services import product as product_service, upstream
+from src.services.cart_store import CartOutbox, CartStore, create_cart_store
+from src.utils.write_behind import WriteBehindQueue
 
 logger = get_logger(__name__)
 
-# Base URL for the fake store API
-BASE_URL = "https://fakestoreapi.com"
+_store: CartStore | None = None
+
+# Upstream mirror of local cart writes, in write-behind mode
+_writes: WriteBehindQueue | None = None
+
+
+async def start_store() -> None:
+    """Open the local cart store and its write-behind queue. Called from the app lifespan."""
+    global _store, _writes
+
+    if settings.CART_STORE_URL and _store is None:
+        store = create_cart_store(
+            settings.CART_STORE_URL,
+            first_local_id=settings.CART_STORE_FIRST_LOCAL_ID,
+            pool_size=settings.CART_STORE_POOL_SIZE,
+        )
+        await store.start()
+        _store = store
+        logger.info(f"Cart store started ({type(store).__name__})")
+
+        if settings.CART_MIRROR_UPSTREAM and settings.CART_WRITE_BEHIND:
+            _writes = WriteBehindQueue(
+                "carts",
+                send=_send_upstream,
+                max_pending=settings.CART_WRITE_BEHIND_MAX_PENDING,
+                concurrency=settings.CART_WRITE_BEHIND_CONCURRENCY,
+                max_attempts=settings.CART_WRITE_BEHIND_MAX_ATTEMPTS,
+                enqueue_timeout=settings.CART_WRITE_BEHIND_ENQUEUE_TIMEOUT,
+                outbox=CartOutbox(store),
+            )
+            _writes.start()
+            await _writes.recover()
+
+
+async def close_store() -> None:
+    """Flush pending upstream writes, then close the local cart store."""
+    global _store, _writes
 
+    if _writes is not None:
+        await _writes.drain(settings.CART_MIRROR_DRAIN_SECONDS)
+        _writes = None
 
-async def get_cart(cart_id: Union[int, str]) -> Dict[str, Any]:
-    """Fetch a specific cart by ID.
+    if _store is not None:
+        await _store.close()
+        _store = None
+
+
+def get_write_queue_stats() -> Dict[str, Any] | None:
+    return _writes.snapshot() if _writes is not None else None
+
+
+def store_enabled() -> bool:
+    return _store is not None
+
+
+async def get_cart(cart_id: Union[int, str], user_id: int | None = None) -> Dict[str, Any]:
+    """Fetch a specific cart by ID, from the local store if it has it.
 
     API Reference: GET /carts/{id}
     Path Parameter: id (integer) - Cart ID
@@ -30,23 +100,145 @@ async def get_cart(cart_id: Union[int, str]) -> Dict[str, Any]:
 
     Args:
         cart_id: The ID of the cart to retrieve (must be integer)
+        user_id: The ID of the requesting user, scopes the local store
 
     Returns:
         Dict[str, Any]: Cart object
 
     Raises:
-        requests.HTTPError: If cart not found (404) or other HTTP errors
+        HTTPException: 404 if upstream doesn't know the cart
+        httpx.HTTPStatusError: On other HTTP errors
     """
-    try:
-        response = requests.get(f"{BASE_URL}/carts/{cart_id}")
+    local_id = _local_cart_id(cart_id)
+    use_store = _store is not None and user_id is not None and local_id is not None
 
-        response.raise_for_status()
+    if use_store:
+        cart = await _store.get(user_id, local_id)
+        if cart is not None:
+            return cart
 
-        return response.json()
-    except requests.RequestException as e:
+    try:
+        cart = await upstream.request("GET", f"/carts/{cart_id}")
+    except httpx.HTTPError as e:
         logger.error(f"Error fetching cart {cart_id}: {e}")
 
         raise
+    except ValueError:
+        # fakestoreapi.com answers unknown carts with an empty body instead of a 404
+        cart = None
+
+    if not isinstance(cart, dict):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Cart with ID {cart_id} not found"
+        )
+
+    if use_store:
+        # Later reads and updates of this cart are served locally
+        await _store.save(user_id, cart)
+
+    return cart
+
+
+async def get_enriched_cart(cart_id: Union[int, str], user_id: int | None = None) -> Dict[str, Any]:
+    """Fetch a cart and join every line with its product record.
+
+    The cart and the product catalog are fetched concurrently; products the
+    catalog doesn't know about are then fetched concurrently by `get_products`.
+
+    Enriched Cart Schema:
+    {
+        "id": integer,
+        "userId": integer,
+        "products": [
+            {"productId": integer, "quantity": integer, "product": Product, "lineTotal": number}
+        ],
+        "itemCount": integer,
+        "subtotal": number
+    }
+
+    Args:
+        cart_id: The ID of the cart to retrieve (must be integer)
+        user_id: The ID of the requesting user, scopes the local store
+
+    Returns:
+        Dict[str, Any]: Cart object with product data, line totals and subtotal
+
+    Raises:
+        httpx.HTTPStatusError: If cart not found (404) or other HTTP errors
+    """
+    cart, _ = await asyncio.gather(get_cart(cart_id, user_id), _prefetch_catalog())
+
+    lines = _parse_lines(cart_id, cart.get("products") or [])
+    product_ids = list(dict.fromkeys(product_id for product_id, _ in lines))
+    products = await product_service.get_products(product_ids) if product_ids else []
+    products_by_id = dict(zip(product_ids, products))
+
+    enriched_lines = []
+    subtotal = 0.0
+    item_count = 0
+
+    for product_id, quantity in lines:
+        product = products_by_id[product_id]
+        price = product.get("price")
+        line_total = round(price * quantity, 2) if isinstance(price, (int, float)) else None
+
+        if line_total is not None:
+            subtotal += line_total
+        item_count += quantity
+
+        enriched_lines.append({
+            "productId": product_id,
+            "quantity": quantity,
+            "product": product,
+            "lineTotal": line_total,
+        })
+
+    # Shallow copy: the cart object itself is left untouched
+    return {
+        **cart,
+        "products": enriched_lines,
+        "itemCount": item_count,
+        "subtotal": round(subtotal, 2),
+    }
+
+
+def _parse_lines(cart_id: Union[int, str], lines: Iterable[Any]) -> List[Tuple[int, int]]:
+    """(product id, quantity) of each cart line, skipping lines that can't be read.
+
+    A line without a quantity counts once; a quantity of 0 or less isn't a
+    line of the cart, so it's skipped like a malformed one.
+    """
+    parsed = []
+
+    for line in lines:
+        try:
+            # fakestoreapi.com returns "productId", carts we send use "id"
+            product_id = int(line.get("productId", line.get("id")))
+            quantity = line.get("quantity")
+            quantity = 1 if quantity is None else int(quantity)
+        except (AttributeError, TypeError, ValueError):
+            logger.warning(f"Skipping malformed line in cart {cart_id}: {line!r}")
+            continue
+
+        if quantity <= 0:
+            logger.warning(f"Skipping line with quantity {quantity} in cart {cart_id}: {line!r}")
+            continue
+
+        parsed.append((product_id, quantity))
+
+    return parsed
+
+
+async def _prefetch_catalog() -> None:
+    if not product_service.product_cache.enabled:
+        return
+
+    try:
+        await product_service.get_catalog_index()
+    except httpx.HTTPError:
+        # get_products falls back to per-id fetches
+        pass
 
 
 async def create_cart(cart_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -72,20 +264,26 @@ async def create_cart(cart_data: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Dict[str, Any]: The created cart object
 
+    With the local store the cart gets the user's next local ID and is
+    returned once stored; the upstream call happens in the background.
+
     Raises:
-        requests.HTTPError: If cart creation fails
+        httpx.HTTPStatusError: If cart creation fails
     """
-    try:
-        response = requests.post(
-            f"{BASE_URL}/carts",
-            json=cart_data,
-            headers={"Content-Type": "application/json"}
-        )
+    if _store is not None:
+        user_id = cart_data["userId"]
+        cart_id = await _store.next_id(user_id)
+
+        async with _reserve_write(user_id, cart_id):
+            cart = _build_cart(cart_id, cart_data)
+            await _store.save(user_id, cart)
+            await _mirror(user_id, cart_id, "POST", "/carts", cart_data)
 
-        response.raise_for_status()
+        return cart
 
-        return response.json()
-    except requests.RequestException as e:
+    try:
+        return await upstream.request("POST", "/carts", json=cart_data)
+    except httpx.HTTPError as e:
         logger.error(f"Error creating cart: {e}")
 
         raise
@@ -116,20 +314,233 @@ async def update_cart(cart_id: Union[int, str], cart_data: Dict[str, Any]) -> Di
     Returns:
         Dict[str, Any]: The updated cart object
 
+    With the local store the cart is replaced there and returned; the
+    upstream call happens in the background.
+
     Raises:
-        requests.HTTPError: If cart not found (404) or update fails
+        httpx.HTTPStatusError: If cart not found (404) or update fails
     """
+    local_id = _local_cart_id(cart_id)
+
+    if _store is not None and local_id is not None:
+        user_id = cart_data["userId"]
+
+        async with _reserve_write(user_id, local_id):
+            cart = _build_cart(local_id, cart_data)
+            await _store.save(user_id, cart)
+            await _mirror(user_id, local_id, "PUT", f"/carts/{cart_id}", cart_data)
+
+        return cart
+
     try:
-        response = requests.put(
-            f"{BASE_URL}/carts/{cart_id}",
-            json=cart_data,
-            headers={"Content-Type": "application/json"}
-        )
+        return await upstream.request("PUT", f"/carts/{cart_id}", json=cart_data)
+    except httpx.HTTPError as e:
+        logger.error(f"Error updating cart {cart_id}: {e}")
+
+        raise
 
-        response.raise_for_status()
 
-        return response.json()
-    except requests.RequestException as e:
+async def add_to_cart(
+    cart_id: Union[int, str],
+    user_id: int,
+    products: Iterable[Tuple[int, int]],
+) -> Dict[str, Any]:
+    """Add quantities of products to a cart, merging lines with the same product.
+
+    Args:
+        cart_id: The ID of the cart to change
+        user_id: The ID of the requesting user
+        products: (product ID, quantity to add) pairs
+
+    Returns:
+        Dict[str, Any]: The updated cart object
+
+    Raises:
+        httpx.HTTPStatusError: If cart not found (404) or update fails
+    """
+    def change(lines: Dict[int, Dict[str, Any]]) -> None:
+        for product_id, quantity in products:
+            line = lines.setdefault(product_id, {"productId": product_id, "quantity": 0})
+            line["quantity"] += quantity
+
+    return await _change_cart(cart_id, user_id, change)
+
+
+async def set_quantities(
+    cart_id: Union[int, str],
+    user_id: int,
+    products: Iterable[Tuple[int, int]],
+) -> Dict[str, Any]:
+    """Set the quantity of products in a cart; a quantity of 0 removes the product.
+
+    Args:
+        cart_id: The ID of the cart to change
+        user_id: The ID of the requesting user
+        products: (product ID, new quantity) pairs, the last one wins for repeated IDs
+
+    Returns:
+        Dict[str, Any]: The updated cart object
+
+    Raises:
+        httpx.HTTPStatusError: If cart not found (404) or update fails
+    """
+    def change(lines: Dict[int, Dict[str, Any]]) -> None:
+        for product_id, quantity in products:
+            if quantity == 0:
+                lines.pop(product_id, None)
+            else:
+                lines[product_id] = {"productId": product_id, "quantity": quantity}
+
+    return await _change_cart(cart_id, user_id, change)
+
+
+async def remove_from_cart(
+    cart_id: Union[int, str],
+    user_id: int,
+    product_ids: Iterable[int],
+) -> Dict[str, Any]:
+    """Remove products from a cart; IDs not in the cart are ignored.
+
+    Args:
+        cart_id: The ID of the cart to change
+        user_id: The ID of the requesting user
+        product_ids: The IDs of the products to remove
+
+    Returns:
+        Dict[str, Any]: The updated cart object
+
+    Raises:
+        httpx.HTTPStatusError: If cart not found (404) or update fails
+    """
+    def change(lines: Dict[int, Dict[str, Any]]) -> None:
+        for product_id in product_ids:
+            lines.pop(product_id, None)
+
+    return await _change_cart(cart_id, user_id, change)
+
+
+async def _change_cart(
+    cart_id: Union[int, str],
+    user_id: int,
+    change: Callable[[Dict[int, Dict[str, Any]]], None],
+) -> Dict[str, Any]:
+    """Apply `change` to the cart lines, keyed by product ID, and store the result.
+
+    With the local store the change runs inside a store transaction and only
+    the final cart is mirrored upstream (one PUT); otherwise the cart is read
+    from and written back to upstream.
+
+    Only the request is proportional to the change: carts are stored and
+    mirrored as whole upstream JSON documents, so applying it indexes every
+    stored line and rewrites the cart, O(cart) per change.
+    """
+    def apply(cart: Dict[str, Any]) -> Dict[str, Any]:
+        lines: Dict[int, Dict[str, Any]] = {}
+        for product_id, quantity in _parse_lines(cart_id, cart.get("products") or []):
+            # Also merges lines that were already duplicated
+            if product_id in lines:
+                lines[product_id]["quantity"] += quantity
+            else:
+                lines[product_id] = {"productId": product_id, "quantity": quantity}
+
+        change(lines)
+
+        return {
+            **cart,
+            "date": datetime.now(timezone.utc).isoformat(),
+            "products": list(lines.values()),
+        }
+
+    local_id = _local_cart_id(cart_id)
+
+    if _store is not None and local_id is not None:
+        async with _reserve_write(user_id, local_id):
+            cart = await _store.update(user_id, local_id, apply)
+            if cart is None:
+                # Not stored yet: read it through from upstream (raises on 404), then retry
+                await get_cart(cart_id, user_id)
+                cart = await _store.update(user_id, local_id, apply)
+
+            await _mirror(user_id, local_id, "PUT", f"/carts/{cart_id}", _upstream_cart_data(cart, user_id))
+
+        return cart
+
+    cart = apply(await get_cart(cart_id, user_id))
+
+    try:
+        await upstream.request("PUT", f"/carts/{cart_id}", json=_upstream_cart_data(cart, user_id))
+    except httpx.HTTPError as e:
         logger.error(f"Error updating cart {cart_id}: {e}")
 
         raise
+
+    return cart
+
+
+def _upstream_cart_data(cart: Dict[str, Any], user_id: int) -> Dict[str, Any]:
+    # The {id, quantity} format fakestoreapi.com expects on writes
+    return {
+        "userId": user_id,
+        "products": [
+            {"id": line["productId"], "quantity": line["quantity"]}
+            for line in cart["products"]
+        ],
+    }
+
+
+def _local_cart_id(cart_id: Union[int, str]) -> int | None:
+    try:
+        return int(cart_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def _build_cart(cart_id: int, cart_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a stored cart in the fakestoreapi.com GET /carts/{id} format."""
+    products: List[Dict[str, Any]] = [
+        {"productId": product["id"], "quantity": product.get("quantity", 1)}
+        for product in cart_data["products"]
+    ]
+
+    return {
+        "id": cart_id,
+        "userId": cart_data["userId"],
+        "date": datetime.now(timezone.utc).isoformat(),
+        "products": products,
+    }
+
+
+@asynccontextmanager
+async def _reserve_write(user_id: int, cart_id: int) -> AsyncIterator[None]:
+    """Wait for room in the write-behind queue before writing locally (backpressure).
+
+    Raises:
+        WriteQueueFull: If the queue stays full
+    """
+    if _writes is None:
+        yield
+        return
+
+    async with _writes.reserve((user_id, cart_id)):
+        yield
+
+
+async def _mirror(user_id: int, cart_id: int, method: str, path: str, cart_data: Dict[str, Any]) -> None:
+    if not settings.CART_MIRROR_UPSTREAM:
+        return
+
+    if _writes is not None:
+        await _writes.submit((user_id, cart_id), method, path, cart_data)
+        return
+
+    # Write-through: the caller waits for upstream, but the local store stays the source
+    # of truth. The local write is already committed, so a failed mirror is only logged:
+    # failing the request would make clients retry and apply their change twice.
+    try:
+        await upstream.request(method, path, json=cart_data)
+    except httpx.HTTPError as e:
+        logger.error(f"Error mirroring {method} {path} to upstream, keeping the local write: {e}")
+
+
+async def _send_upstream(method: str, path: str, cart_data: Dict[str, Any]) -> None:
+    await upstream.request(method, path, json=cart_data)
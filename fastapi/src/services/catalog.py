@@ -0,0 +1,268 @@
+"""In-memory indexes derived from a full product catalog load.
+
+A `CatalogIndex` is built once per `GET /products` fetch and never mutated
+afterwards. The product service swaps the current index with a single
+assignment, so concurrent readers either see the previous index or the new
+one, never a half-built state.
+
+Besides id and category lookups the index precomputes what `search` needs:
+an inverted index over title and description tokens, and price, rating and
+title orders sorted once, with the rank of every product in each, so range
+filters are a pair of bisections and sorting the matches never reads the
+whole catalog.
+
+The index only holds positions into `products`, never the product objects
+themselves, so a memory-mapped catalog (see `src.utils.snapshot`) is
+decoded once while indexing and then only for the products actually read.
+"""
+
+import re
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Sequence, Set, Tuple, Union
+
+Product = Dict[str, Any]
+
+SORT_KEYS = ("relevance", "price_asc", "price_desc", "rating", "title")
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_product_id(product_id: Union[int, str]) -> int | None:
+    """Return the integer form of a product ID, or None if it isn't numeric."""
+    if isinstance(product_id, int):
+        return product_id
+
+    if isinstance(product_id, str) and product_id.strip().isdigit():
+        return int(product_id)
+
+    return None
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase search tokens with naive plural stemming."""
+    return [
+        token[:-1] if len(token) > 3 and token.endswith("s") and not token.endswith("ss") else token
+        for token in _TOKEN_RE.findall(text.lower())
+    ]
+
+
+def _rating(product: Product) -> float:
+    rating = product.get("rating")
+
+    return float(rating.get("rate") or 0) if isinstance(rating, dict) else 0.0
+
+
+def _ranks(order: Sequence[int]) -> Tuple[int, ...]:
+    """The rank of every position in `order`, indexed by position."""
+    ranks = [0] * len(order)
+    for rank, position in enumerate(order):
+        ranks[position] = rank
+
+    return tuple(ranks)
+
+
+@dataclass(frozen=True)
+class _RankRange:
+    """Positions `order[low:high]` of a presorted order, tested for membership through their rank."""
+
+    order: Tuple[int, ...]
+    ranks: Tuple[int, ...]
+    low: int
+    high: int
+
+    def __len__(self) -> int:
+        return max(self.high - self.low, 0)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.order[self.low:self.high])
+
+    def intersection(self, positions: Iterable[int]) -> List[int]:
+        """The `positions` in the range, like `frozenset.intersection`."""
+        ranks, low, high = self.ranks, self.low, self.high
+
+        return [position for position in positions if low <= ranks[position] < high]
+
+
+@dataclass(frozen=True)
+class SearchResult:
+    total: int
+    items: List[Product]
+    next_offset: int | None
+
+
+@dataclass(frozen=True)
+class CatalogIndex:
+    products: Sequence[Product]
+    # Positions (into `products`) per id, per category, per lowercased category and per token
+    by_id: Dict[int, int]
+    by_category: Dict[str, Tuple[int, ...]]
+    category_positions: Dict[str, FrozenSet[int]]
+    postings: Dict[str, FrozenSet[int]]
+    title_tokens: Tuple[FrozenSet[str], ...]
+    # Positions ordered by price/rating (with the matching sorted keys) and by title,
+    # and the rank of each position in those orders
+    price_order: Tuple[int, ...]
+    sorted_prices: Tuple[float, ...]
+    price_ranks: Tuple[int, ...]
+    rating_order: Tuple[int, ...]
+    sorted_ratings: Tuple[float, ...]
+    rating_ranks: Tuple[int, ...]
+    title_order: Tuple[int, ...]
+    title_ranks: Tuple[int, ...]
+    loaded_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def build(cls, products: Sequence[Product]) -> "CatalogIndex":
+        by_id: Dict[int, int] = {}
+        by_category: Dict[str, List[int]] = {}
+        category_positions: Dict[str, Set[int]] = {}
+        postings: Dict[str, Set[int]] = {}
+        title_tokens: List[FrozenSet[str]] = []
+        prices: List[float] = []
+        ratings: List[float] = []
+        titles: List[str] = []
+
+        for position, product in enumerate(products):
+            product_id = normalize_product_id(product.get("id"))
+            if product_id is not None:
+                by_id[product_id] = position
+
+            category = str(product.get("category") or "")
+            by_category.setdefault(category, []).append(position)
+            category_positions.setdefault(category.lower(), set()).add(position)
+
+            title = frozenset(tokenize(str(product.get("title") or "")))
+            title_tokens.append(title)
+            for token in title.union(tokenize(str(product.get("description") or ""))):
+                postings.setdefault(token, set()).add(position)
+
+            prices.append(float(product.get("price") or 0))
+            ratings.append(_rating(product))
+            titles.append(str(product.get("title") or "").lower())
+
+        price_order = sorted(range(len(prices)), key=prices.__getitem__)
+        rating_order = sorted(range(len(ratings)), key=ratings.__getitem__)
+        title_order = sorted(range(len(titles)), key=titles.__getitem__)
+
+        return cls(
+            products=products,
+            by_id=by_id,
+            by_category={category: tuple(positions) for category, positions in by_category.items()},
+            category_positions={category: frozenset(p) for category, p in category_positions.items()},
+            postings={token: frozenset(positions) for token, positions in postings.items()},
+            title_tokens=tuple(title_tokens),
+            price_order=tuple(price_order),
+            sorted_prices=tuple(prices[i] for i in price_order),
+            price_ranks=_ranks(price_order),
+            rating_order=tuple(rating_order),
+            sorted_ratings=tuple(ratings[i] for i in rating_order),
+            rating_ranks=_ranks(rating_order),
+            title_order=tuple(title_order),
+            title_ranks=_ranks(title_order),
+        )
+
+    @property
+    def categories(self) -> List[str]:
+        return sorted(category for category in self.by_category if category)
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.loaded_at
+
+    def get(self, product_id: Union[int, str]) -> Product | None:
+        normalized_id = normalize_product_id(product_id)
+
+        position = self.by_id.get(normalized_id) if normalized_id is not None else None
+
+        return self.products[position] if position is not None else None
+
+    def search(
+        self,
+        query: str | None = None,
+        category: str | None = None,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        min_rating: float | None = None,
+        sort: str = "relevance",
+        offset: int = 0,
+        limit: int = 10,
+    ) -> SearchResult:
+        """Filter, sort and paginate the catalog without scanning every product.
+
+        Token and category filters are precomputed position sets, price and
+        rating filters a bisected range of a presorted order. The matches are
+        the positions of the smallest filter found in all the others (sets
+        hashed, ranges checked by rank), and they're sorted by their precomputed
+        rank, so a request costs about the size of its smallest filter rather
+        than the size of the catalog.
+        """
+        query_tokens = list(dict.fromkeys(tokenize(query))) if query else []
+        filters: List[Union[FrozenSet[int], _RankRange]] = []
+
+        for token in query_tokens:
+            filters.append(self.postings.get(token, frozenset()))
+
+        if category:
+            filters.append(self.category_positions.get(category.strip().lower(), frozenset()))
+
+        if min_price is not None or max_price is not None:
+            low = bisect_left(self.sorted_prices, min_price) if min_price is not None else 0
+            high = bisect_right(self.sorted_prices, max_price) if max_price is not None else len(self.sorted_prices)
+            filters.append(_RankRange(self.price_order, self.price_ranks, low, high))
+
+        if min_rating is not None:
+            low = bisect_left(self.sorted_ratings, min_rating)
+            filters.append(_RankRange(self.rating_order, self.rating_ranks, low, len(self.sorted_ratings)))
+
+        candidates: Iterable[int] | None = None
+        if len(filters) == 1:
+            candidates = filters[0]
+        elif filters:
+            # Start from the smallest filter and keep its positions found in the others
+            smallest, *others = sorted(filters, key=len)
+            candidates = smallest
+            for other in others:
+                candidates = other.intersection(candidates)
+                if not candidates:
+                    break
+
+        ordered = self._order(candidates, sort, query_tokens)
+        page = ordered[offset:offset + limit]
+        next_offset = offset + limit if offset + limit < len(ordered) else None
+
+        return SearchResult(
+            total=len(ordered),
+            items=[self.products[position] for position in page],
+            next_offset=next_offset,
+        )
+
+    def _order(self, candidates: Iterable[int] | None, sort: str, query_tokens: List[str]) -> Sequence[int]:
+        if candidates is None:
+            # Every product: the presorted orders are the result
+            if sort == "price_asc":
+                return self.price_order
+            if sort == "price_desc":
+                return self.price_order[::-1]
+            if sort == "rating":
+                return self.rating_order[::-1]
+            if sort == "title":
+                return self.title_order
+            return range(len(self.products))
+
+        if sort == "price_asc":
+            return sorted(candidates, key=self.price_ranks.__getitem__)
+        if sort == "price_desc":
+            return sorted(candidates, key=self.price_ranks.__getitem__, reverse=True)
+        if sort == "rating":
+            return sorted(candidates, key=self.rating_ranks.__getitem__, reverse=True)
+        if sort == "title":
+            return sorted(candidates, key=self.title_ranks.__getitem__)
+
+        positions = sorted(candidates)
+        if query_tokens:
+            # Products matching more query tokens in their title rank first
+            return sorted(positions, key=lambda p: -len(self.title_tokens[p].intersection(query_tokens)))
+
+        return positions
@@ -2,19 +2,69 @@
 
 Handles interaction with the fakestoreapi.com product endpoints.
 This service strictly follows the fakestoreapi.com API specification.
+
+Responses are kept in an in-process TTL + LRU cache (see `src.utils.cache`),
+since the catalog rarely changes and agents fetch it on every conversation.
+Their encoded JSON is kept too (`product_payloads`), so cache hits are sent
+without serializing them again. Catalog refreshes revalidate with the
+upstream ETag: an unchanged catalog costs a 304 and keeps the very same
+list, so its index and encoded payloads stay valid.
+Every full catalog load also rebuilds a `CatalogIndex` (see
+`src.services.catalog`), which answers single-product lookups without a
+network round trip.
+
+With `CATALOG_SNAPSHOT_PATH` set (under gunicorn), the catalog is
+served from a memory-mapped snapshot shared by all workers (see
+`src.utils.snapshot`) instead of a per-worker copy: workers start from it,
+records are decoded only when read, and a refresh reuses a snapshot another
+worker just wrote, or revalidates it with its stored ETag, instead of
+fetching the catalog again.
 """
 
-import requests
-from typing import Dict, List, Any, Union
+import asyncio
+import httpx
+from fastapi import HTTPException, status
+from typing import Callable, Dict, List, Any, Sequence, Tuple, Union
+from src.config import settings
 from src.logger import get_logger
+from src.services import upstream
+from src.services.catalog import CatalogIndex
+from src.utils import snapshot
+from src.utils.cache import TTLCache
+from src.utils.responses import EncodedJSON, PayloadCache
+from src.utils.timing import span
 
 logger = get_logger(__name__)
 
-# Base URL for the fake store API
-BASE_URL = "https://fakestoreapi.com"
+ALL_PRODUCTS_KEY = "all"
+
+product_cache = TTLCache(
+    "products",
+    ttl=settings.PRODUCT_CACHE_TTL_SECONDS,
+    stale_ttl=settings.PRODUCT_CACHE_STALE_TTL_SECONDS,
+    max_entries=settings.PRODUCT_CACHE_MAX_ENTRIES,
+    enabled=settings.PRODUCT_CACHE_ENABLED,
+    # Serve the last known catalog while the upstream is unreachable or its circuit is open
+    fallback_errors=(httpx.TransportError,),
+)
+
+# Encoded responses, tied to the cached objects they were built from
+product_payloads = PayloadCache(settings.PRODUCT_PAYLOAD_CACHE_MAX_ENTRIES)
+
+# Swapped as a whole on every catalog load, never mutated in place
+_catalog_index: CatalogIndex | None = None
+
+# Snapshot the cached catalog is mapped from, with `CATALOG_SNAPSHOT_PATH`
+_snapshot: snapshot.Snapshot | None = None
 
+# Last catalog fetched from upstream and its ETag, for conditional refreshes
+# without a snapshot (the snapshot stores its own ETag)
+_upstream_catalog: List[Dict[str, Any]] | None = None
+_upstream_catalog_etag: str | None = None
+_revalidations = {"notModified": 0, "modified": 0}
 
-async def get_all_products() -> List[Dict[str, Any]]:
+
+async def get_all_products() -> Sequence[Dict[str, Any]]:
     """Fetch all products from the API.
 
     API Reference: GET /products
@@ -31,22 +81,140 @@ async def get_all_products() -> List[Dict[str, Any]]:
     }
 
     Returns:
-        List[Dict[str, Any]]: List of product objects
+        Sequence[Dict[str, Any]]: List of product objects (read-only, mapped
+            from the shared snapshot when there is one)
 
     Raises:
-        requests.HTTPError: If request fails
+        httpx.HTTPStatusError: If request fails
     """
-    try:
-        response = requests.get(f"{BASE_URL}/products")
+    return await product_cache.get_or_load(ALL_PRODUCTS_KEY, _fetch_all_products)
+
+
+async def get_catalog_index() -> CatalogIndex:
+    """Return the index built from the current (possibly cached) catalog."""
+    products = await get_all_products()
+
+    index = _catalog_index
+    if index is None or index.products is not products:
+        # The catalog didn't come through `_fetch_all_products` (e.g. the cache
+        # is disabled), so index it here.
+        index = _swap_catalog_index(products)
+
+    return index
+
+
+def _swap_catalog_index(products: Sequence[Dict[str, Any]]) -> CatalogIndex:
+    global _catalog_index
+
+    with span("index"):
+        index = CatalogIndex.build(products)
+    _catalog_index = index
+
+    return index
+
+
+async def _fetch_all_products() -> Sequence[Dict[str, Any]]:
+    path = settings.CATALOG_SNAPSHOT_PATH
+    if not path or not product_cache.enabled:
+        products = await _request_all_products()
+    else:
+        products = await _refresh_snapshot(path)
+
+    if _catalog_index is None or _catalog_index.products is not products:
+        _swap_catalog_index(products)
+
+    return products
+
+
+async def _refresh_snapshot(path: str) -> Sequence[Dict[str, Any]]:
+    # One worker refreshes the snapshot while the others wait for it
+    async with snapshot.refresh_lock(path):
+        current = snapshot.read_snapshot(path)
+
+        if current is None or current.age >= product_cache.ttl:
+            products, etag = await _request_catalog(current.etag if current is not None else None)
+            if products is upstream.NOT_MODIFIED:
+                snapshot.renew_snapshot(path, current)
+            else:
+                snapshot.write_snapshot(path, products, etag)
+
+            current = snapshot.read_snapshot(path)
+            if current is None:
+                raise OSError(f"Catalog snapshot {path} is unreadable right after writing it")
 
-        response.raise_for_status()
+    return _use_snapshot(current).records
 
-        return response.json()
-    except requests.RequestException as e:
+
+def _use_snapshot(current: snapshot.Snapshot) -> snapshot.Snapshot:
+    """Keep serving the mapping already in use while the snapshot holds the same catalog.
+
+    The cached catalog then stays the very same object, so its index and
+    encoded payloads stay valid.
+    """
+    global _snapshot
+
+    if _snapshot is not None and (
+        _snapshot.created_at == current.created_at or (current.etag is not None and _snapshot.etag == current.etag)
+    ):
+        return _snapshot
+
+    _snapshot = current
+
+    return current
+
+
+async def _request_all_products() -> List[Dict[str, Any]]:
+    global _upstream_catalog, _upstream_catalog_etag
+
+    etag = _upstream_catalog_etag if _upstream_catalog is not None else None
+    products, etag = await _request_catalog(etag)
+
+    if products is upstream.NOT_MODIFIED:
+        return _upstream_catalog
+
+    _upstream_catalog, _upstream_catalog_etag = products, etag
+
+    return products
+
+
+async def _request_catalog(etag: str | None) -> Tuple[Any, str | None]:
+    """GET /products, conditional on `etag` when there is one."""
+    try:
+        products, new_etag = await upstream.request_if_modified("/products", etag)
+    except httpx.HTTPError as e:
         logger.error(f"Error fetching all products: {e}")
 
         raise
 
+    if products is upstream.NOT_MODIFIED:
+        _revalidations["notModified"] += 1
+    elif etag is not None:
+        _revalidations["modified"] += 1
+
+    return products, new_etag
+
+
+def load_catalog_snapshot() -> bool:
+    """Seed the product cache from the shared snapshot, e.g. on worker startup.
+
+    Returns:
+        bool: Whether a usable snapshot was found
+    """
+    path = settings.CATALOG_SNAPSHOT_PATH
+    if not path or not product_cache.enabled:
+        return False
+
+    current = snapshot.read_snapshot(path)
+    if current is None or current.age >= product_cache.ttl + product_cache.stale_ttl:
+        return False
+
+    records = _use_snapshot(current).records
+    product_cache.set(ALL_PRODUCTS_KEY, records, age=current.age)
+    _swap_catalog_index(records)
+    logger.info(f"Loaded {len(current.records)} products from the catalog snapshot ({current.age:.0f}s old)")
+
+    return True
+
 
 async def get_product(product_id: Union[int, str]) -> Dict[str, Any]:
     """Fetch a specific product by ID.
@@ -72,15 +240,149 @@ async def get_product(product_id: Union[int, str]) -> Dict[str, Any]:
         Dict[str, Any]: Product object
 
     Raises:
-        requests.HTTPError: If product not found (404) or other HTTP errors
+        HTTPException: 404 if upstream doesn't know the product
+        httpx.HTTPStatusError: On other HTTP errors
     """
-    try:
-        response = requests.get(f"{BASE_URL}/products/{product_id}")
+    if product_cache.enabled:
+        try:
+            product = (await get_catalog_index()).get(product_id)
+        except httpx.HTTPError:
+            product = None
 
-        response.raise_for_status()
+        if product is not None:
+            return product
 
-        return response.json()
-    except requests.RequestException as e:
+    # Fall back to a per-id fetch for ids the catalog doesn't know about
+    return await product_cache.get_or_load(
+        ("product", str(product_id)),
+        lambda: _fetch_product(product_id)
+    )
+
+
+async def _fetch_product(product_id: Union[int, str]) -> Dict[str, Any]:
+    try:
+        product = await upstream.request("GET", f"/products/{product_id}")
+    except httpx.HTTPError as e:
         logger.error(f"Error fetching product {product_id}: {e}")
 
         raise
+    except ValueError:
+        # fakestoreapi.com answers unknown products with an empty body instead of a 404
+        product = None
+
+    if not isinstance(product, dict):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Product with ID {product_id} not found"
+        )
+
+    return product
+
+
+async def get_products(product_ids: List[int]) -> List[Dict[str, Any]]:
+    """Fetch several products at once, preserving the requested order.
+
+    IDs are resolved from the catalog index first; the remaining ones are
+    fetched concurrently, at most `UPSTREAM_BATCH_CONCURRENCY` at a time.
+
+    Args:
+        product_ids: The IDs of the products to retrieve
+
+    Returns:
+        List[Dict[str, Any]]: One entry per ID, either the product object or
+            a not-found marker {"id": id, "found": false}
+
+    Raises:
+        httpx.HTTPStatusError: On upstream errors other than not found
+    """
+    found: Dict[int, Dict[str, Any] | None] = {}
+
+    if product_cache.enabled:
+        try:
+            index = await get_catalog_index()
+        except httpx.HTTPError:
+            index = None
+
+        if index is not None:
+            for product_id in product_ids:
+                product = index.get(product_id)
+                if product is not None:
+                    found[product_id] = product
+
+    # Repeated IDs are fetched once and returned at every requested position
+    missing = list(dict.fromkeys(product_id for product_id in product_ids if product_id not in found))
+    if missing:
+        semaphore = asyncio.Semaphore(settings.UPSTREAM_BATCH_CONCURRENCY)
+
+        async def fetch(product_id: int) -> Dict[str, Any] | None:
+            async with semaphore:
+                try:
+                    return await get_product(product_id)
+                except httpx.HTTPStatusError as e:
+                    if e.response.status_code == 404:
+                        return None
+                    raise
+                except HTTPException as e:
+                    if e.status_code == status.HTTP_404_NOT_FOUND:
+                        return None
+                    raise
+
+        for product_id, product in zip(missing, await asyncio.gather(*map(fetch, missing))):
+            found[product_id] = product
+
+    return [
+        found[product_id] if found[product_id] is not None else {"id": product_id, "found": False}
+        for product_id in product_ids
+    ]
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Return hit, miss and refresh counters of the product cache."""
+    return {
+        **product_cache.snapshot(),
+        "payloads": product_payloads.snapshot(),
+        "upstreamRevalidations": dict(_revalidations),
+    }
+
+
+def encode_cached(key: Any, source: Any, build: Callable[[], Any]) -> EncodedJSON:
+    """Return the encoded `build()` result for a cached `source` (catalog or product).
+
+    With the cache disabled `source` is fetched anew on every request, so it
+    is encoded every time instead of being kept.
+    """
+    if not product_cache.enabled:
+        return EncodedJSON.encode(build())
+
+    return product_payloads.get(key, source, build)
+
+
+def get_catalog_age() -> float | None:
+    """Seconds since the cached catalog was loaded, or None while it's cold."""
+    return product_cache.age(ALL_PRODUCTS_KEY)
+
+
+async def search_products(**criteria: Any) -> Dict[str, Any]:
+    """Search, filter, sort and paginate the catalog from the in-memory index.
+
+    Args:
+        **criteria: Keyword arguments for `CatalogIndex.search`
+            (query, category, min_price, max_price, min_rating, sort, offset, limit)
+
+    Returns:
+        Dict[str, Any]: {"total", "count", "items", "nextCursor"}
+
+    Raises:
+        httpx.HTTPStatusError: If the catalog can't be loaded
+    """
+    index = await get_catalog_index()
+
+    with span("search"):
+        result = index.search(**criteria)
+
+    return {
+        "total": result.total,
+        "count": len(result.items),
+        "items": result.items,
+        "nextCursor": str(result.next_offset) if result.next_offset is not None else None,
+    }
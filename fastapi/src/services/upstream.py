@@ -0,0 +1,388 @@
+"""Shared async HTTP client for the fakestoreapi.com upstream.
+
+A single ``httpx.AsyncClient`` is created in the application lifespan and
+reused by every service module, so upstream calls never block the event loop
+and connections are pooled and kept alive between requests.
+
+Concurrent identical GET requests (same method, URL and body) share a single
+in-flight upstream call, see `src.utils.singleflight`. `request_if_modified`
+revalidates a previous response with `If-None-Match`, so an unchanged
+resource costs a 304 instead of the full body.
+
+Every call goes through a circuit breaker per endpoint ("/products/{id}").
+Idempotent calls are also retried with jittered backoff on connection
+errors and 502/503/504, within a retry budget shared by the worker, and can
+be hedged once they run past the endpoint's p95 latency (see
+`src.utils.resilience`).
+"""
+
+import asyncio
+import hashlib
+import json as jsonlib
+import time
+from functools import partial
+from importlib.util import find_spec
+from typing import Any, Dict, Hashable, Mapping, Tuple
+
+import httpx
+
+from src import metrics
+from src.config import settings
+from src.logger import get_logger
+from src.utils.resilience import CLOSED, CircuitBreaker, LatencyTracker, RetryBudget, backoff
+from src.utils.singleflight import SingleFlight
+from src.utils.timing import span
+
+logger = get_logger(__name__)
+
+# Base URL for the fake store API (point it at `src.stub.fakestore` to run offline)
+BASE_URL = settings.UPSTREAM_BASE_URL
+
+# HTTP/2 needs the optional `h2` package (`httpx[http2]`)
+HTTP2_AVAILABLE = find_spec("h2") is not None
+
+# Only idempotent requests are safe to share between callers, retry or hedge
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD"})
+
+RETRYABLE_STATUSES = frozenset({502, 503, 504})
+
+# Returned by `request_if_modified` when the upstream answers 304
+NOT_MODIFIED = object()
+
+_client: httpx.AsyncClient | None = None
+
+_flight = SingleFlight("upstream")
+
+# Plain counters for health checks, kept even without prometheus-client
+_in_flight = 0
+_consecutive_failures = 0
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_latencies: Dict[str, LatencyTracker] = {}
+_retry_budget = RetryBudget(
+    ratio=settings.UPSTREAM_RETRY_BUDGET_RATIO,
+    min_per_second=settings.UPSTREAM_RETRY_BUDGET_MIN_PER_SECOND,
+)
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised without calling the upstream while the endpoint's circuit is open."""
+
+
+def _build_client(transport: httpx.AsyncBaseTransport | None = None) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.UPSTREAM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.UPSTREAM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.UPSTREAM_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(
+        settings.UPSTREAM_READ_TIMEOUT,
+        connect=settings.UPSTREAM_CONNECT_TIMEOUT,
+        pool=settings.UPSTREAM_POOL_TIMEOUT,
+    )
+
+    return httpx.AsyncClient(
+        base_url=BASE_URL,
+        limits=limits,
+        timeout=timeout,
+        http2=settings.UPSTREAM_HTTP2 and HTTP2_AVAILABLE,
+        headers={"Accept": "application/json"},
+        transport=transport,
+    )
+
+
+async def start_client(transport: httpx.AsyncBaseTransport | None = None) -> None:
+    """Create the shared upstream client. Called from the app lifespan.
+
+    Args:
+        transport: Optional custom transport, e.g. `httpx.ASGITransport` around
+            the FakeStore stand-in to serve the upstream in-process
+    """
+    global _client
+
+    if _client is None:
+        _client = _build_client(transport)
+        logger.info(
+            f"Upstream client started for {BASE_URL} "
+            f"(http2={settings.UPSTREAM_HTTP2 and HTTP2_AVAILABLE})"
+        )
+
+
+async def close_client() -> None:
+    """Close the shared upstream client and its pooled connections."""
+    global _client
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared upstream client, creating it lazily if needed.
+
+    The lazy path only matters outside of the app lifespan (scripts, shells);
+    the running server always gets the client created in `start_client`.
+    """
+    global _client
+
+    if _client is None:
+        _client = _build_client()
+
+    return _client
+
+
+async def request(
+    method: str,
+    path: str,
+    *,
+    json: Any = None,
+    connect_timeout: float | None = None,
+    read_timeout: float | None = None,
+) -> Any:
+    """Send a request to the upstream API and return the decoded JSON body.
+
+    Args:
+        method: HTTP method (GET, POST, PUT, ...)
+        path: Path relative to BASE_URL (e.g. "/products/1")
+        json: Optional JSON request body
+        connect_timeout: Per-call connect timeout override in seconds
+        read_timeout: Per-call read timeout override in seconds
+
+    Returns:
+        Any: The decoded JSON response
+
+    Raises:
+        httpx.HTTPStatusError: If the upstream answers with a 4xx/5xx status
+        httpx.RequestError: If the upstream can't be reached or times out
+        CircuitOpenError: If the endpoint's circuit is open
+    """
+    method = method.upper()
+    call = partial(_call_json, method, path, json, connect_timeout, read_timeout)
+
+    if settings.UPSTREAM_COALESCE_REQUESTS and method in IDEMPOTENT_METHODS:
+        return await _flight.do(_request_key(method, path, json), call)
+
+    return await call()
+
+
+async def request_if_modified(path: str, etag: str | None) -> Tuple[Any, str | None]:
+    """GET `path`, revalidating a previous response when its ETag is known.
+
+    Not coalesced: callers (e.g. cache refreshes) already run one at a time.
+
+    Args:
+        path: Path relative to BASE_URL (e.g. "/products")
+        etag: ETag of the previous response, sent as If-None-Match
+
+    Returns:
+        Tuple[Any, str | None]: (NOT_MODIFIED, etag) if the upstream answered
+            304, otherwise the decoded JSON body and its ETag (if any)
+
+    Raises:
+        httpx.HTTPStatusError: If the upstream answers with a 4xx/5xx status
+        httpx.RequestError: If the upstream can't be reached or times out
+        CircuitOpenError: If the endpoint's circuit is open
+    """
+    headers = {"If-None-Match": etag} if etag else None
+    response = await _call("GET", path, None, None, None, headers)
+
+    if etag and response.status_code == 304:
+        return NOT_MODIFIED, etag
+
+    response.raise_for_status()
+
+    return response.json(), response.headers.get("ETag")
+
+
+def get_singleflight_stats() -> Dict[str, Any]:
+    """Return how many upstream calls were made and how many were deduplicated."""
+    return _flight.snapshot()
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Return upstream load and failure counters, e.g. for readiness checks."""
+    return {
+        "inFlight": _in_flight,
+        "maxConnections": settings.UPSTREAM_MAX_CONNECTIONS,
+        "saturation": round(_in_flight / settings.UPSTREAM_MAX_CONNECTIONS, 4),
+        "consecutiveFailures": _consecutive_failures,
+    }
+
+
+def get_circuit_states() -> Dict[str, str]:
+    """Return the circuit state ("closed", "open", "half_open") of every endpoint called so far."""
+    return {endpoint: breaker.state for endpoint, breaker in _breakers.items()}
+
+
+def get_resilience_stats() -> Dict[str, Any]:
+    return {
+        "breakers": {endpoint: breaker.snapshot() for endpoint, breaker in _breakers.items()},
+        "retryBudget": _retry_budget.snapshot(),
+    }
+
+
+def _request_key(method: str, path: str, json: Any) -> Hashable:
+    body_hash = None
+    if json is not None:
+        body = jsonlib.dumps(json, sort_keys=True, separators=(",", ":")).encode()
+        body_hash = hashlib.sha1(body).hexdigest()
+
+    return method, path, body_hash
+
+
+async def _call_json(
+    method: str,
+    path: str,
+    json: Any,
+    connect_timeout: float | None,
+    read_timeout: float | None,
+) -> Any:
+    response = await _call(method, path, json, connect_timeout, read_timeout)
+    response.raise_for_status()
+
+    return response.json()
+
+
+async def _call(
+    method: str,
+    path: str,
+    json: Any,
+    connect_timeout: float | None,
+    read_timeout: float | None,
+    headers: Mapping[str, str] | None = None,
+) -> httpx.Response:
+    endpoint = metrics.endpoint_template(path)
+    breaker = _breakers.setdefault(endpoint, CircuitBreaker(
+        failure_threshold=settings.UPSTREAM_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=settings.UPSTREAM_BREAKER_RESET_SECONDS,
+    ))
+    idempotent = method in IDEMPOTENT_METHODS
+    send = partial(_send_hedged if idempotent and settings.UPSTREAM_HEDGE_ENABLED else _send,
+                   endpoint, method, path, json, connect_timeout, read_timeout, headers)
+
+    _retry_budget.deposit()
+    attempt = 0
+
+    while True:
+        if not breaker.allow():
+            metrics.record_resilience_event(endpoint, "short_circuit")
+            raise CircuitOpenError(f"Circuit open for {method} {endpoint}")
+
+        response, error = None, None
+        try:
+            response = await send()
+        except httpx.TransportError as e:
+            error = e
+        except BaseException:
+            breaker.release_probe()
+            raise
+
+        if error is None and response.status_code < 500:
+            breaker.record_success()
+            break
+
+        if breaker.record_failure():
+            metrics.record_resilience_event(endpoint, "circuit_open")
+            logger.warning(f"Circuit opened for {endpoint} after {breaker.failures} consecutive failures")
+
+        attempt += 1
+        retryable = error is not None or response.status_code in RETRYABLE_STATUSES
+        if (
+            not idempotent
+            or not retryable
+            or attempt > settings.UPSTREAM_RETRY_ATTEMPTS
+            or breaker.state != CLOSED
+            or not _retry_budget.try_withdraw()
+        ):
+            if error is not None:
+                raise error
+            break
+
+        metrics.record_resilience_event(endpoint, "retry")
+        await asyncio.sleep(backoff(
+            attempt, settings.UPSTREAM_RETRY_BACKOFF_SECONDS, settings.UPSTREAM_RETRY_MAX_BACKOFF_SECONDS
+        ))
+
+    return response
+
+
+async def _send_hedged(
+    endpoint: str,
+    method: str,
+    path: str,
+    json: Any,
+    connect_timeout: float | None,
+    read_timeout: float | None,
+    headers: Mapping[str, str] | None = None,
+) -> httpx.Response:
+    """Send the call, and a second one if the first outlives the endpoint's p95."""
+    send = partial(_send, endpoint, method, path, json, connect_timeout, read_timeout, headers)
+    first = asyncio.ensure_future(send())
+
+    delay = _latencies[endpoint].percentile(settings.UPSTREAM_HEDGE_PERCENTILE) if endpoint in _latencies else None
+    if delay is None:
+        return await first
+
+    done, _ = await asyncio.wait({first}, timeout=delay)
+    if done or not _retry_budget.try_withdraw():
+        return await first
+
+    metrics.record_resilience_event(endpoint, "hedge")
+    pending = {first, asyncio.ensure_future(send())}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None and task.result().status_code < 500:
+                    return task.result()
+
+        # Both failed, report the first one
+        return await first
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def _send(
+    endpoint: str,
+    method: str,
+    path: str,
+    json: Any,
+    connect_timeout: float | None,
+    read_timeout: float | None,
+    headers: Mapping[str, str] | None = None,
+) -> httpx.Response:
+    global _in_flight, _consecutive_failures
+
+    timeout = httpx.Timeout(
+        read_timeout or settings.UPSTREAM_READ_TIMEOUT,
+        connect=connect_timeout or settings.UPSTREAM_CONNECT_TIMEOUT,
+        pool=settings.UPSTREAM_POOL_TIMEOUT,
+    )
+
+    started = time.perf_counter()
+    status_code: int | str = "error"
+    _in_flight += 1
+    metrics.UPSTREAM_IN_FLIGHT.inc()
+    try:
+        with span("upstream"):
+            response = await get_client().request(method, path, json=json, headers=headers, timeout=timeout)
+        status_code = response.status_code
+    except asyncio.CancelledError:
+        # e.g. the losing call of a hedged pair, neither a failure nor a latency sample
+        status_code = "cancelled"
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        _in_flight -= 1
+        metrics.UPSTREAM_IN_FLIGHT.dec()
+        metrics.observe_upstream(method, path, status_code, elapsed)
+
+        # Unreachable or 5xx counts as a failure, anything else proves the upstream is up
+        if status_code == "error" or (isinstance(status_code, int) and status_code >= 500):
+            _consecutive_failures += 1
+        elif status_code != "cancelled":
+            _consecutive_failures = 0
+            _latencies.setdefault(endpoint, LatencyTracker()).add(elapsed)
+
+    return response
@@ -0,0 +1 @@
+"""Local stand-in for the fakestoreapi.com upstream."""
\ No newline at end of file
@@ -0,0 +1,209 @@
+"""Local FakeStore stand-in generated from `data/fakestoreapi.json`.
+
+Serves the fakestoreapi.com endpoints the services use, so the whole stack
+can run offline and be load-tested at request rates the public API would
+never allow. Records are generated deterministically from the component
+schemas of the OpenAPI spec (plus the few fields the live API returns but
+the spec omits, like product ratings).
+
+Run standalone:
+    uvicorn src.stub.fakestore:app --port 3003
+    UPSTREAM_BASE_URL=http://localhost:3003 just run
+
+Or in-process, without sockets:
+    await upstream.start_client(transport=httpx.ASGITransport(app=create_app()))
+
+Latency and error injection are configured with FAKESTORE_STUB_* settings.
+"""
+
+import asyncio
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
+from pydantic_settings import SettingsConfigDict
+
+from src.config import CustomBaseSettings
+
+SPEC_PATH = Path(__file__).resolve().parents[2] / "data" / "fakestoreapi.json"
+
+CATEGORIES = ("men's clothing", "jewelery", "electronics", "women's clothing")
+_ADJECTIVES = ("Slim", "Classic", "Casual", "Premium", "Lightweight", "Waterproof", "Vintage", "Cotton")
+_NOUNS = {
+    "men's clothing": ("Jacket", "T-Shirt", "Backpack", "Hoodie"),
+    "jewelery": ("Bracelet", "Ring", "Necklace", "Earrings"),
+    "electronics": ("Hard Drive", "Monitor", "SSD", "Headphones"),
+    "women's clothing": ("Raincoat", "Blouse", "Dress", "Cardigan"),
+}
+
+
+class StubConfig(CustomBaseSettings):
+    model_config = SettingsConfigDict(
+        env_prefix="FAKESTORE_STUB_", env_file=".env", env_file_encoding="utf-8", extra="ignore"
+    )
+
+    PRODUCTS: int = 20
+    CARTS: int = 7
+    USERS: int = 10
+    SEED: int = 42
+
+    # Injected before every response
+    LATENCY_MS: float = 0.0
+    LATENCY_JITTER_MS: float = 0.0
+    # Fraction (0-1) of requests answered with ERROR_STATUS
+    ERROR_RATE: float = 0.0
+    ERROR_STATUS: int = status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+def load_spec(path: Path = SPEC_PATH) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as spec_file:
+        return json.load(spec_file)
+
+
+def _value_for(name: str, schema: Dict[str, Any], record_id: int, rng: random.Random) -> Any:
+    """Generate a value for a schema property, falling back on its type."""
+    if "example" in schema:
+        return schema["example"]
+
+    schema_type = schema.get("type")
+    if name == "id":
+        return record_id
+    if schema_type == "integer":
+        return rng.randint(1, 10)
+    if schema_type == "number":
+        return round(rng.uniform(5, 500), 2)
+    if schema.get("format") == "uri":
+        return f"https://fakestoreapi.com/img/{name}-{record_id}.png"
+    if name == "email":
+        return f"user{record_id}@example.com"
+    if schema_type == "array":
+        return []
+
+    return f"{name}-{record_id}"
+
+
+def _generate_records(
+    schema: Dict[str, Any], count: int, rng: random.Random
+) -> List[Dict[str, Any]]:
+    properties = schema.get("properties", {})
+
+    return [
+        {name: _value_for(name, prop, record_id, rng) for name, prop in properties.items()}
+        for record_id in range(1, count + 1)
+    ]
+
+
+def generate_data(spec: Dict[str, Any], config: StubConfig) -> Dict[str, List[Dict[str, Any]]]:
+    """Generate the products, carts and users collections from the spec schemas."""
+    rng = random.Random(config.SEED)
+    schemas = spec["components"]["schemas"]
+
+    products = _generate_records(schemas["Product"], config.PRODUCTS, rng)
+    for product in products:
+        category = CATEGORIES[(product["id"] - 1) % len(CATEGORIES)]
+        noun = rng.choice(_NOUNS[category])
+        product["category"] = category
+        product["title"] = f"{rng.choice(_ADJECTIVES)} {noun} {product['id']}"
+        product["description"] = (
+            f"{product['title']} for everyday use. "
+            + " ".join(rng.choice(_ADJECTIVES).lower() for _ in range(30))
+        )
+        # Returned by the live API but missing from the spec
+        product["rating"] = {"rate": round(rng.uniform(1, 5), 1), "count": rng.randint(0, 500)}
+
+    users = _generate_records(schemas["User"], config.USERS, rng)
+
+    carts = _generate_records(schemas["Cart"], config.CARTS, rng)
+    for cart in carts:
+        # The live API returns {productId, quantity} lines instead of Products
+        cart["userId"] = rng.randint(1, max(config.USERS, 1))
+        cart["date"] = "2020-03-02T00:00:00.000Z"
+        cart["products"] = [
+            {"productId": product_id, "quantity": rng.randint(1, 4)}
+            for product_id in rng.sample(range(1, config.PRODUCTS + 1), k=min(3, config.PRODUCTS))
+        ]
+        cart["__v"] = 0
+
+    return {"products": products, "carts": carts, "users": users}
+
+
+def create_app(config: StubConfig | None = None, spec: Dict[str, Any] | None = None) -> FastAPI:
+    config = config or StubConfig()
+    spec = spec or load_spec()
+    data = generate_data(spec, config)
+    by_id = {name: {record["id"]: record for record in records} for name, records in data.items()}
+    rng = random.Random(config.SEED)
+
+    app = FastAPI(title=f"{spec['info']['title']} stand-in", openapi_url=None)
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        if config.LATENCY_MS or config.LATENCY_JITTER_MS:
+            delay = config.LATENCY_MS + rng.uniform(0, config.LATENCY_JITTER_MS)
+            await asyncio.sleep(delay / 1000)
+
+        if config.ERROR_RATE and rng.random() < config.ERROR_RATE:
+            return JSONResponse({"error": "injected failure"}, status_code=config.ERROR_STATUS)
+
+        return await call_next(request)
+
+    def not_found(resource: str, record_id: int) -> JSONResponse:
+        return JSONResponse(
+            {"error": f"{resource} with id {record_id} not found"},
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+
+    # Register the collection endpoints declared in the spec
+    for resource in ("products", "carts", "users"):
+        if f"/{resource}" not in spec["paths"]:
+            continue
+
+        def register(resource: str) -> None:
+            records = data[resource]
+            index = by_id[resource]
+            singular = resource[:-1].capitalize()
+
+            @app.get(f"/{resource}", name=f"list_{resource}")
+            async def list_records(limit: int | None = None):
+                return records[:limit] if limit else records
+
+            @app.get(f"/{resource}/{{record_id}}", name=f"get_{resource}")
+            async def get_record(record_id: int):
+                record = index.get(record_id)
+                return record if record is not None else not_found(singular, record_id)
+
+            @app.post(f"/{resource}", name=f"create_{resource}", status_code=status.HTTP_201_CREATED)
+            async def create_record(request: Request):
+                # Like the live API: echo with a new id, nothing is persisted
+                return {**await request.json(), "id": len(records) + 1}
+
+            @app.put(f"/{resource}/{{record_id}}", name=f"update_{resource}")
+            async def update_record(record_id: int, request: Request):
+                return {**await request.json(), "id": record_id}
+
+            @app.delete(f"/{resource}/{{record_id}}", name=f"delete_{resource}")
+            async def delete_record(record_id: int):
+                record = index.get(record_id)
+                return record if record is not None else not_found(singular, record_id)
+
+        register(resource)
+
+    if "/auth/login" in spec["paths"]:
+        @app.post("/auth/login", name="login")
+        async def login(request: Request):
+            credentials = await request.json()
+            if not credentials.get("username") or not credentials.get("password"):
+                return JSONResponse(
+                    {"error": "username and password are required"},
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                )
+
+            return {"token": f"stub-token-{credentials['username']}"}
+
+    return app
+
+
+app = create_app()
@@ -0,0 +1,168 @@
+"""In-process TTL + LRU cache with stale-while-revalidate.
+
+Usage:
+    cache = TTLCache("products", ttl=300, stale_ttl=3600, max_entries=1024)
+    products = await cache.get_or_load("all", fetch_all_products)
+
+- Fresh entries are served straight from memory.
+- Expired entries are still served while they are within `stale_ttl`, and a
+  single background refresh is started for them.
+- Concurrent misses for the same key share one in-flight load, so N parallel
+  requests trigger a single upstream fetch.
+- The least recently used entry is evicted once `max_entries` is reached.
+- When a load fails with one of `fallback_errors` (e.g. the upstream circuit
+  is open), the last cached value is served however old it is.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, Type
+
+from src import metrics
+from src.logger import get_logger
+from src.utils.singleflight import SingleFlight
+
+logger = get_logger(__name__)
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    expires_at: float
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    refreshes: int = 0
+    refresh_errors: int = 0
+    fallbacks: int = 0
+    evictions: int = 0
+
+
+class TTLCache:
+    def __init__(
+        self,
+        name: str,
+        ttl: float,
+        stale_ttl: float = 0.0,
+        max_entries: int = 1024,
+        enabled: bool = True,
+        fallback_errors: Tuple[Type[BaseException], ...] = (),
+    ) -> None:
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.fallback_errors = fallback_errors
+        self.stats = CacheStats()
+
+        self._entries: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+        self._loads = SingleFlight(name)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_or_load(self, key: Hashable, loader: Loader) -> Any:
+        """Return the cached value for `key`, loading it with `loader` if needed."""
+        if not self.enabled:
+            return await loader()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            now = time.monotonic()
+
+            if now < entry.expires_at:
+                self.stats.hits += 1
+                metrics.record_cache_lookup(self.name, "hit")
+                return entry.value
+
+            if now < entry.expires_at + self.stale_ttl:
+                self.stats.stale_hits += 1
+                metrics.record_cache_lookup(self.name, "stale")
+                self._refresh_in_background(key, loader)
+                return entry.value
+
+        self.stats.misses += 1
+        metrics.record_cache_lookup(self.name, "miss")
+
+        try:
+            return await self._loads.do(key, lambda: self._load(key, loader))
+        except self.fallback_errors as e:
+            if entry is None:
+                raise
+
+            self.stats.fallbacks += 1
+            metrics.record_cache_lookup(self.name, "fallback")
+            logger.warning(f"Serving expired {self.name} cache entry after a failed load: {e!r}")
+
+            return entry.value
+
+    def set(self, key: Hashable, value: Any, age: float = 0.0) -> None:
+        """Store `value`, treating it as `age` seconds old (e.g. when loaded from a snapshot)."""
+        self._entries[key] = CacheEntry(value, time.monotonic() + self.ttl - age)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def age(self, key: Hashable) -> float | None:
+        """Seconds since `key` was loaded, or None if it isn't cached."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        return time.monotonic() - (entry.expires_at - self.ttl)
+
+    def invalidate(self, key: Hashable | None = None) -> None:
+        """Drop one key, or every entry when no key is given."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the counters and current size, e.g. for a stats endpoint."""
+        lookups = self.stats.hits + self.stats.stale_hits + self.stats.misses
+
+        return {
+            "name": self.name,
+            "size": len(self._entries),
+            "maxEntries": self.max_entries,
+            **asdict(self.stats),
+            "hitRatio": round((lookups - self.stats.misses) / lookups, 4) if lookups else None,
+        }
+
+    async def _load(self, key: Hashable, loader: Loader) -> Any:
+        value = await loader()
+        self.set(key, value)
+
+        return value
+
+    def _refresh_in_background(self, key: Hashable, loader: Loader) -> None:
+        if key in self._loads:
+            return
+
+        self.stats.refreshes += 1
+        self._loads.start(key, lambda: self._load(key, loader)).add_done_callback(
+            self._on_refresh_done
+        )
+
+    def _on_refresh_done(self, future: asyncio.Future) -> None:
+        if future.cancelled():
+            return
+
+        error = future.exception()
+        metrics.record_cache_refresh(self.name, "error" if error is not None else "ok")
+        if error is not None:
+            self.stats.refresh_errors += 1
+            logger.warning(f"Background refresh failed for {self.name} cache: {error!r}")
@@ -0,0 +1,110 @@
+"""Content-Encoding negotiation and codecs.
+
+gzip is always available. brotli (`br`) and zstd need the optional
+`brotli` and `zstandard` packages (`prod` dependency group) and are simply
+not offered without them. When a client accepts several, the preference
+is zstd, then br, then gzip.
+
+Two sets of levels are used: `STREAM_LEVELS` for responses compressed on
+the fly, cheap enough for every request, and `STORED_LEVELS` for cached
+payloads, which are compressed once and then served many times.
+"""
+
+import zlib
+from typing import Callable, Dict, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+STREAM_LEVELS = {"zstd": 3, "br": 4, "gzip": 6}
+STORED_LEVELS = {"zstd": 12, "br": 9, "gzip": 9}
+
+AVAILABLE_ENCODINGS: Tuple[str, ...] = tuple(
+    encoding for encoding, available in (("zstd", zstandard), ("br", brotli), ("gzip", zlib)) if available
+)
+
+
+def negotiate(accept_encoding: str | None) -> str | None:
+    """Pick the preferred available encoding the client accepts, or None for identity."""
+    if not accept_encoding:
+        return None
+
+    accepted: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    for encoding in AVAILABLE_ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+
+    return None
+
+
+def compress(data: bytes, encoding: str, level: int | None = None) -> bytes:
+    """Compress a whole body (at the stored level by default)."""
+    level = STORED_LEVELS[encoding] if level is None else level
+
+    if encoding == "gzip":
+        return zlib.compress(data, level, wbits=31)
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(data)
+
+    raise ValueError(f"Unsupported encoding {encoding!r}")
+
+
+class StreamCompressor:
+    """Incremental compressor for streamed bodies.
+
+    `compress(chunk, flush=True)` returns everything needed to decode the
+    chunk so far, so each chunk (e.g. an SSE event) reaches the client right
+    away instead of waiting in the compressor's buffer.
+    """
+
+    def __init__(self, encoding: str, level: int | None = None) -> None:
+        self.encoding = encoding
+        level = STREAM_LEVELS[encoding] if level is None else level
+
+        self._process: Callable[[bytes], bytes]
+        self._flush: Callable[[], bytes]
+        self._finish: Callable[[], bytes]
+
+        if encoding == "gzip":
+            compressor = zlib.compressobj(level, wbits=31)
+            self._process = compressor.compress
+            self._flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = compressor.flush
+        elif encoding == "br":
+            compressor = brotli.Compressor(quality=level)
+            self._process, self._flush, self._finish = compressor.process, compressor.flush, compressor.finish
+        elif encoding == "zstd":
+            compressor = zstandard.ZstdCompressor(level=level).compressobj()
+            self._process = compressor.compress
+            self._flush = lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            self._finish = compressor.flush
+        else:
+            raise ValueError(f"Unsupported encoding {encoding!r}")
+
+    def compress(self, chunk: bytes, flush: bool = True) -> bytes:
+        data = self._process(chunk)
+
+        return data + self._flush() if flush else data
+
+    def finish(self) -> bytes:
+        return self._finish()
@@ -1,24 +1,48 @@
 """Centralized exception handling utilities."""
 
+import time
 from typing import Dict, Any, Callable
 from functools import wraps
-import requests
+import httpx
 from fastapi import HTTPException, status
 from pydantic import ValidationError
+from src import metrics
 from src.logger import get_logger
+from src.utils.timing import span
+from src.utils.write_behind import WriteQueueFull
 
 logger = get_logger(__name__)
 
 
-def handle_route_errors(operation: str):
+def handle_route_errors(operation: str, resource: str | None = None):
     """Decorator to handle all route exceptions in a centralized way.
     
+    Also records the operation latency and in-flight count metrics.
+
     Args:
         operation: Description of the operation for logging (e.g., "get cart", "create product")
+        resource: Name of the resource in not found errors (e.g., "cart"), taken from the
+            operation's second word when not given
     """
     def decorator(func: Callable):
         @wraps(func)
         async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+            metrics.ROUTE_IN_FLIGHT.labels(operation).inc()
+            try:
+                with span("handler"):
+                    response = await guarded(*args, **kwargs)
+                status_code = getattr(response, "status_code", status.HTTP_200_OK)
+                return response
+            except HTTPException as e:
+                status_code = e.status_code
+                raise
+            finally:
+                metrics.ROUTE_IN_FLIGHT.labels(operation).dec()
+                metrics.observe_route(operation, status_code, time.perf_counter() - started)
+
+        async def guarded(*args, **kwargs):
             try:
                 return await func(*args, **kwargs)
             except HTTPException:
@@ -34,31 +58,39 @@ def handle_route_errors(operation: str):
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Validation error: {'; '.join(error_details)}"
                 )
-            except requests.HTTPError as e:
-                # Handle requests errors (from service layer)
+            except httpx.HTTPStatusError as e:
+                # Handle upstream HTTP errors (from service layer)
                 if e.response.status_code == 404:
                     logger.error(f"Not found during {operation}: {e}")
                     # Extract resource info from the error or operation
-                    resource = operation.split()[1] if len(operation.split()) > 1 else "Resource"
-                    # Try to extract ID from the URL in the error
-                    try:
-                        # The URL typically ends with /carts/{id} or /products/{id}
-                        url = str(e.response.url)
-                        resource_id = url.split('/')[-1]
-                        raise HTTPException(
-                            status_code=status.HTTP_404_NOT_FOUND,
-                            detail=f"{resource.capitalize()} with ID {resource_id} not found"
-                        )
-                    except:
-                        raise HTTPException(
-                            status_code=status.HTTP_404_NOT_FOUND,
-                            detail=f"{resource.capitalize()} not found"
-                        )
+                    name = resource or (operation.split()[1] if len(operation.split()) > 1 else "Resource")
+                    # The URL typically ends with /carts/{id} or /products/{id}
+                    resource_id = e.response.url.path.rstrip("/").split("/")[-1]
+                    if resource_id.isdigit():
+                        detail = f"{name.capitalize()} with ID {resource_id} not found"
+                    else:
+                        detail = f"{name.capitalize()} not found"
+                    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
                 logger.error(f"HTTP error during {operation}: {e}")
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail=f"Failed to {operation}"
                 )
+            except httpx.RequestError as e:
+                # Upstream unreachable or timed out (from service layer)
+                logger.error(f"Upstream request failed during {operation}: {e!r}")
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail=f"Failed to {operation}: the store service is not responding. Please try again shortly."
+                )
+            except WriteQueueFull as e:
+                # Too many cart writes waiting for upstream (write-behind backpressure)
+                logger.warning(f"Write queue full during {operation}: {e}")
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail=f"Failed to {operation}: too many changes are waiting to be saved. Please try again shortly.",
+                    headers={"Retry-After": "1"},
+                )
             except Exception as e:
                 logger.error(f"Unexpected error during {operation}: {e}")
                 raise HTTPException(
@@ -0,0 +1,113 @@
+"""Event loop lag monitor.
+
+A coroutine ticks every `interval` seconds and measures how late it wakes up
+(the loop lag). A watchdog thread checks the last tick independently: when
+the loop hasn't ticked for longer than `threshold`, the loop thread is stuck
+in a blocking call, and its current stack is logged while it's still
+blocked, pointing straight at the offending call (e.g. a synchronous HTTP
+request inside an async handler).
+"""
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict
+
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = 0.05, threshold: float = 0.1) -> None:
+        self.interval = interval
+        self.threshold = threshold
+
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.blocked_count = 0
+
+        self._last_tick = time.monotonic()
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._tick())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "lastLagMs": round(self.last_lag * 1000, 3),
+            "maxLagMs": round(self.max_lag * 1000, 3),
+            "blockedCount": self.blocked_count,
+            "thresholdMs": round(self.threshold * 1000, 3),
+        }
+
+    async def _tick(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+
+            lag = max(loop.time() - started - self.interval, 0.0)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self._last_tick = time.monotonic()
+
+            if lag > self.threshold:
+                logger.warning(f"Event loop lag of {lag * 1000:.0f}ms (threshold {self.threshold * 1000:.0f}ms)")
+
+    def _watch(self) -> None:
+        reported_tick = None
+
+        while not self._stopped.wait(self.interval):
+            last_tick = self._last_tick
+            stalled_for = time.monotonic() - last_tick
+
+            if stalled_for <= self.threshold or reported_tick == last_tick:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+
+            # Waiting in the selector means the loop is idle (e.g. starved of
+            # the GIL by another thread), not blocked by a handler
+            if frame is not None and frame.f_globals.get("__name__") == "selectors":
+                continue
+
+            # Report each stall once, with the stack of the blocked loop thread
+            reported_tick = last_tick
+            self.blocked_count += 1
+
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "<unavailable>\n"
+            logger.warning(
+                f"Event loop blocked for more than {stalled_for * 1000:.0f}ms, "
+                f"loop thread is currently at:\n{stack}"
+            )
@@ -0,0 +1,52 @@
+"""Time-bounded sampling profiler for a live worker.
+
+Samples the stack of every thread (the event loop thread included) at a
+fixed interval from a background thread and aggregates them as collapsed
+("folded") stacks, one `frame;frame;frame count` line per unique stack.
+The output loads directly into speedscope or `flamegraph.pl`.
+"""
+
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+from typing import Dict
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", code.co_filename)
+
+    return f"{module}:{code.co_name}:{frame.f_lineno}"
+
+
+def _collapse(frame: FrameType | None, thread_name: str) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+
+    return ";".join([thread_name, *reversed(labels)])
+
+
+def sample_stacks(duration: float, interval: float) -> Dict[str, int]:
+    """Sample all thread stacks for `duration` seconds. Blocking: run it in a thread."""
+    samples: Counter[str] = Counter()
+    own_id = threading.get_ident()
+    deadline = time.monotonic() + duration
+
+    while time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id != own_id:
+                samples[_collapse(frame, names.get(thread_id, str(thread_id)))] += 1
+
+        time.sleep(interval)
+
+    return dict(samples)
+
+
+def render_collapsed(samples: Dict[str, int]) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(samples.items()))
@@ -0,0 +1,93 @@
+"""Field projection and compact mode for tool responses.
+
+Products carry long descriptions and image URLs that most agent turns never
+need. Projection builds a new top-level dict holding only the requested keys;
+values are shared with the cached objects, never deep-copied, so the cache is
+left untouched and the cost is proportional to the number of kept fields.
+"""
+
+from typing import Any, Dict, Iterable, List, Sequence
+
+from src.config import settings
+
+PRODUCT_FIELDS = ("id", "title", "price", "description", "category", "image", "rating")
+CART_FIELDS = ("id", "userId", "date", "products", "itemCount", "subtotal")
+
+# Dropped in compact mode unless explicitly requested through `fields`
+PRODUCT_COMPACT_DROP = frozenset({"image"})
+CART_COMPACT_DROP = frozenset({"__v"})
+
+
+def _truncate(text: Any, length: int) -> Any:
+    if not isinstance(text, str) or len(text) <= length:
+        return text
+
+    return text[:length].rstrip() + "…"
+
+
+def project(
+    item: Dict[str, Any],
+    fields: Sequence[str] | None = None,
+    compact: bool = False,
+    compact_drop: Iterable[str] = (),
+) -> Dict[str, Any]:
+    """Return a shallow projection of `item`.
+
+    Args:
+        item: The source object (left unmodified)
+        fields: Keys to keep, in order; None keeps every key
+        compact: Drop `compact_drop` keys and truncate long descriptions
+        compact_drop: Keys removed in compact mode when `fields` isn't given
+    """
+    if fields is None and not compact:
+        return item
+
+    if fields is not None:
+        keys: Iterable[str] = fields
+    else:
+        keys = (key for key in item if key not in compact_drop)
+
+    projected = {key: item[key] for key in keys if key in item}
+
+    if compact and "description" in projected:
+        projected["description"] = _truncate(
+            projected["description"], settings.COMPACT_DESCRIPTION_LENGTH
+        )
+
+    return projected
+
+
+def project_product(
+    product: Dict[str, Any], fields: Sequence[str] | None = None, compact: bool = False
+) -> Dict[str, Any]:
+    return project(product, fields, compact, PRODUCT_COMPACT_DROP)
+
+
+def project_products(
+    products: List[Dict[str, Any]], fields: Sequence[str] | None = None, compact: bool = False
+) -> List[Dict[str, Any]]:
+    if fields is None and not compact:
+        return products
+
+    # Not-found markers ({"id": 99, "found": false}) are kept whole, so a
+    # missing product never looks like a found one without the requested fields
+    return [
+        product if product.get("found") is False else project(product, fields, compact, PRODUCT_COMPACT_DROP)
+        for product in products
+    ]
+
+
+def project_cart(
+    cart: Dict[str, Any], fields: Sequence[str] | None = None, compact: bool = False
+) -> Dict[str, Any]:
+    projected = project(cart, fields, compact, CART_COMPACT_DROP)
+
+    # Enriched carts embed product records, which are compacted too
+    if compact and any("product" in line for line in projected.get("products") or []):
+        projected["products"] = [
+            {**line, "product": project_product(line["product"], compact=True)}
+            if "product" in line else line
+            for line in projected["products"]
+        ]
+
+    return projected
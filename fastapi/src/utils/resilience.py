@@ -0,0 +1,141 @@
+"""Building blocks for resilient upstream calls.
+
+- `CircuitBreaker`: opens after `failure_threshold` consecutive failures and
+  short-circuits calls for `reset_timeout` seconds, then lets a single probe
+  through (half open) to decide whether to close again.
+- `RetryBudget`: caps retries (and hedges) to a fraction of the regular
+  traffic, plus a small floor, so retries can't multiply the load on an
+  upstream that is already struggling.
+- `LatencyTracker`: recent latencies of one endpoint, used to hedge requests
+  that take longer than the usual p95.
+- `backoff`: full-jitter exponential backoff delay.
+"""
+
+import random
+import time
+from collections import deque
+from typing import Any, Deque, Dict
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return CLOSED
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return OPEN
+
+        return HALF_OPEN
+
+    def allow(self) -> bool:
+        """Whether a call may go through now. Half open lets one probe in at a time."""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == OPEN or self._probing:
+            return False
+
+        self._probing = True
+
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> bool:
+        """Count a failure. Returns True if it opened the circuit."""
+        self.failures += 1
+        self._probing = False
+
+        if self._opened_at is not None or self.failures >= self.failure_threshold:
+            was_closed = self._opened_at is None
+            self._opened_at = time.monotonic()
+            return was_closed
+
+        return False
+
+    def release_probe(self) -> None:
+        """Let another probe through when one was abandoned (e.g. cancelled)."""
+        self._probing = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"state": self.state, "failures": self.failures}
+
+
+class RetryBudget:
+    def __init__(self, ratio: float = 0.1, min_per_second: float = 1.0, max_tokens: float = 10.0) -> None:
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+
+        self.tokens = max_tokens
+        self.exhausted = 0
+        self._refilled_at = time.monotonic()
+
+    def deposit(self) -> None:
+        """Called for every regular request."""
+        self.tokens = min(self.tokens + self.ratio, self.max_tokens)
+
+    def try_withdraw(self) -> bool:
+        """Take one token for a retry or hedge, if any is left."""
+        now = time.monotonic()
+        self.tokens = min(self.tokens + (now - self._refilled_at) * self.min_per_second, self.max_tokens)
+        self._refilled_at = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+
+        self.exhausted += 1
+
+        return False
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"tokens": round(self.tokens, 2), "exhausted": self.exhausted}
+
+
+class LatencyTracker:
+    def __init__(self, size: int = 200, min_samples: int = 20) -> None:
+        self.min_samples = min_samples
+
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._percentiles: Dict[float, float] = {}
+        self._added = 0
+
+    def add(self, elapsed: float) -> None:
+        self._samples.append(elapsed)
+        self._added += 1
+
+        # Recompute lazily, every 10 samples
+        if self._added % 10 == 0:
+            self._percentiles.clear()
+
+    def percentile(self, q: float) -> float | None:
+        """Latency at quantile `q` (0-1), or None until there are enough samples."""
+        if len(self._samples) < self.min_samples:
+            return None
+
+        if q not in self._percentiles:
+            ordered = sorted(self._samples)
+            self._percentiles[q] = ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+        return self._percentiles[q]
+
+
+def backoff(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter delay before retry number `attempt` (starting at 1)."""
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
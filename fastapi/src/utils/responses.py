@@ -0,0 +1,185 @@
+"""Response classes shared by the routes.
+
+JSON is encoded with `orjson` when it's installed (`prod` dependency group),
+falling back to the stdlib `json` module with the same compact output.
+
+Payloads that are served over and over (the catalog, single products) can
+be encoded once and kept in a `PayloadCache`, next to their ETag, and sent
+with `EncodedJSONResponse`, so cache hits skip serialization entirely.
+`conditional_response` answers a GET whose `If-None-Match` matches that ETag
+with an empty 304 instead, and otherwise sends the payload compressed with
+the client's preferred encoding; each compressed variant is also computed
+once and kept with the payload (see `src.utils.compression`). A catalog
+mapped from the shared snapshot is already encoded, so its payload is the
+mapped bytes themselves (see `src.utils.snapshot`).
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Mapping, Tuple
+
+from fastapi import Request, status
+from fastapi.responses import JSONResponse as BaseJSONResponse, Response
+
+from src.config import settings
+from src.utils import compression
+from src.utils.snapshot import MappedCatalog
+from src.utils.timing import span
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def dumps(content: Any) -> bytes:
+    """Encode `content` as compact UTF-8 JSON."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class JSONResponse(BaseJSONResponse):
+    """JSON response whose encoding time is reported as the `encode` span."""
+
+    def render(self, content: Any) -> bytes:
+        with span("encode"):
+            return dumps(content)
+
+
+@dataclass(frozen=True)
+class EncodedJSON:
+    # A memoryview for payloads served straight from a memory-mapped snapshot
+    body: bytes | memoryview
+    etag: str
+    # Compressed bodies by content encoding, filled on first use
+    variants: Dict[str, bytes] = field(default_factory=dict, compare=False, repr=False)
+
+    @classmethod
+    def encode(cls, content: Any) -> "EncodedJSON":
+        with span("encode"):
+            body = content.json if isinstance(content, MappedCatalog) else dumps(content)
+
+        return cls(body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+
+    def variant(self, encoding: str | None) -> bytes | memoryview:
+        """The body compressed with `encoding` (None for identity), compressed only once."""
+        if encoding is None:
+            return self.body
+
+        if encoding not in self.variants:
+            with span("compress"):
+                self.variants[encoding] = compression.compress(self.body, encoding)
+
+        return self.variants[encoding]
+
+    def variant_etag(self, encoding: str | None) -> str:
+        """Each encoding is a different representation, so it gets its own strong ETag."""
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+
+class EncodedJSONResponse(Response):
+    """Send an already encoded payload, with its ETag, optionally compressed."""
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        payload: EncodedJSON,
+        status_code: int = 200,
+        headers: Mapping[str, str] | None = None,
+        encoding: str | None = None,
+    ) -> None:
+        variant_headers = {"ETag": payload.variant_etag(encoding)}
+        if encoding is not None:
+            variant_headers["Content-Encoding"] = encoding
+
+        super().__init__(
+            # bytes() of a bytes object is the object itself, mapped payloads are copied per response
+            content=bytes(payload.variant(encoding)), status_code=status_code, headers={**variant_headers, **(headers or {})}
+        )
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an If-None-Match header matches `etag` (weak comparison, as RFC 9110 requires)."""
+    if not if_none_match:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    return any(tag.strip().removeprefix("W/") == etag.removeprefix("W/") for tag in if_none_match.split(","))
+
+
+def cache_control(max_age: int) -> str:
+    """Cache-Control value for read endpoints; 0 makes clients revalidate every time."""
+    return f"public, max-age={max_age}" if max_age > 0 else "no-cache"
+
+
+def conditional_response(
+    request: Request, payload: EncodedJSON, headers: Mapping[str, str] | None = None
+) -> Response:
+    """Send `payload`, or an empty 304 if the client already has it (GET and HEAD only).
+
+    Payloads of at least `COMPRESSION_MINIMUM_SIZE` bytes are sent compressed
+    with the client's preferred encoding.
+    """
+    encoding = None
+    if settings.COMPRESSION_ENABLED:
+        headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+        if len(payload.body) >= settings.COMPRESSION_MINIMUM_SIZE:
+            encoding = compression.negotiate(request.headers.get("accept-encoding"))
+
+    if_none_match = request.headers.get("if-none-match")
+    if request.method in ("GET", "HEAD") and (
+        etag_matches(if_none_match, payload.etag) or etag_matches(if_none_match, payload.variant_etag(encoding))
+    ):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": payload.variant_etag(encoding), **(headers or {})},
+        )
+
+    return EncodedJSONResponse(payload, headers=headers, encoding=encoding)
+
+
+class PayloadCache:
+    """LRU cache of encoded payloads, each tied to the object it was built from.
+
+    An entry is only reused while `source` is the very same object (e.g. the
+    cached catalog list), so a catalog refresh invalidates it without any
+    explicit eviction. Entries hold a reference to their source, so ids are
+    never reused while cached.
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: OrderedDict[Hashable, Tuple[Any, EncodedJSON]] = OrderedDict()
+
+    def get(self, key: Hashable, source: Any, build: Callable[[], Any]) -> EncodedJSON:
+        """Return the payload for `key`, encoding `build()` if `source` changed."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] is source:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        self.misses += 1
+        payload = EncodedJSON.encode(build())
+        self._entries[key] = (source, payload)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+        return payload
+
+    def snapshot(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
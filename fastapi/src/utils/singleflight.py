@@ -0,0 +1,60 @@
+"""Single-flight: collapse concurrent identical calls into one.
+
+Usage:
+    flight = SingleFlight("upstream")
+    data = await flight.do(("GET", "/carts/1"), lambda: fetch_cart(1))
+
+While a call for a key is in flight, every other caller with the same key
+awaits the same future instead of starting its own call. The future is
+forgotten as soon as it completes, so nothing is cached beyond the call.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from src import metrics
+
+
+class SingleFlight:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.calls = 0
+        self.deduplicated = 0
+
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    def start(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        """Return the in-flight future for `key`, starting `fn` if there is none."""
+        future = self._inflight.get(key)
+        if future is not None:
+            self.deduplicated += 1
+            metrics.record_deduplicated(self.name)
+            return future
+
+        self.calls += 1
+        future = asyncio.ensure_future(fn())
+        self._inflight[key] = future
+        future.add_done_callback(lambda done: self._forget(key, done))
+
+        return future
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `fn` once for all concurrent callers of `key` and return its result."""
+        # Shield the shared call so a cancelled caller doesn't cancel it for
+        # every other caller waiting on the same key.
+        return await asyncio.shield(self.start(key, fn))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "inFlight": len(self._inflight),
+            "calls": self.calls,
+            "deduplicated": self.deduplicated,
+        }
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
@@ -0,0 +1,236 @@
+"""Catalog snapshot shared by every worker through a memory-mapped file.
+
+Usage:
+    write_snapshot("/dev/shm/catalog.snapshot", products, etag)
+    snapshot = read_snapshot("/dev/shm/catalog.snapshot")
+    snapshot.records[3]        # decoded from the mapping on access
+    snapshot.records.json      # the whole catalog, already encoded
+
+    async with refresh_lock(path):
+        ...  # only one worker refreshes the snapshot at a time
+
+Layout (little endian):
+    header  magic b"CTLG" | version u16 | pad | created_at f64 | count u32 | etag length u32 | payload length u32
+    etag    the upstream ETag of the catalog, ASCII (may be empty)
+    offsets count × (offset u32, length u32) of each record, relative to the payload
+    payload the records as a compact JSON array, each one at its offset
+
+Records stay in the mapping: workers keep the file mapped and decode a
+record only when it's read (with a few recently read ones kept decoded),
+and the full catalog response is the payload itself, sent without encoding
+it again. On `/dev/shm` the file lives in shared memory, so its pages are
+shared by all workers instead of each one keeping a copy.
+
+Writers build the file next to the target and `os.replace` it, so readers
+always map a complete snapshot; a mapping of the previous file stays valid
+until it's released.
+"""
+
+import asyncio
+import json
+import mmap
+import os
+import struct
+import tempfile
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterator, List, Sequence
+
+import httpx
+
+from src.logger import get_logger
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows, snapshot refreshes won't be serialized
+    fcntl = None
+
+logger = get_logger(__name__)
+
+MAGIC = b"CTLG"
+VERSION = 2
+
+_HEADER = struct.Struct("<4sHxxdIII")
+_OFFSET = struct.Struct("<II")
+
+
+class MappedCatalog(Sequence[Dict[str, Any]]):
+    """Read-only list of the snapshot records, decoded from the mapping on access.
+
+    The `decoded_cache_size` most recently read records are kept decoded, so
+    hot products are the same object from one request to the next (encoded
+    payloads are cached per object, see `src.utils.responses.PayloadCache`).
+    """
+
+    def __init__(self, view: mmap.mmap, count: int, offsets_start: int, payload_start: int, payload_length: int,
+                 decoded_cache_size: int = 64) -> None:
+        self._view = view
+        self._count = count
+        self._offsets_start = offsets_start
+        self._payload_start = payload_start
+        self._payload_length = payload_length
+        self._decoded_cache_size = decoded_cache_size
+        self._decoded: OrderedDict[int, Dict[str, Any]] = OrderedDict()
+
+    @property
+    def json(self) -> memoryview:
+        """The records as an encoded JSON array, straight from the mapping."""
+        return memoryview(self._view)[self._payload_start:self._payload_start + self._payload_length]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(self._count))]
+
+        if position < 0:
+            position += self._count
+        if not 0 <= position < self._count:
+            raise IndexError("snapshot record index out of range")
+
+        record = self._decoded.get(position)
+        if record is not None:
+            self._decoded.move_to_end(position)
+            return record
+
+        offset, length = _OFFSET.unpack_from(self._view, self._offsets_start + position * _OFFSET.size)
+        start = self._payload_start + offset
+        record = json.loads(self._view[start:start + length])
+
+        self._decoded[position] = record
+        if len(self._decoded) > self._decoded_cache_size:
+            self._decoded.popitem(last=False)
+
+        return record
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for position in range(self._count):
+            yield self[position]
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    records: MappedCatalog
+    created_at: float
+    etag: str | None
+
+    @property
+    def age(self) -> float:
+        """Seconds since the snapshot was written."""
+        return max(time.time() - self.created_at, 0.0)
+
+
+def write_snapshot(
+    path: str, records: List[Dict[str, Any]], etag: str | None = None, created_at: float | None = None
+) -> None:
+    encoded = [json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode() for record in records]
+
+    offsets = bytearray()
+    position = 1  # after the opening bracket
+    for record in encoded:
+        offsets += _OFFSET.pack(position, len(record))
+        position += len(record) + 1  # and the comma or closing bracket after it
+
+    payload = b"[" + b",".join(encoded) + b"]"
+    etag_bytes = (etag or "").encode("ascii")
+    header = _HEADER.pack(MAGIC, VERSION, created_at or time.time(), len(records), len(etag_bytes), len(payload))
+
+    _replace(path, header, etag_bytes, offsets, payload)
+
+
+def renew_snapshot(path: str, current: Snapshot) -> None:
+    """Write `current` again with a new creation time, e.g. after upstream confirmed it's unchanged."""
+    view = current.records._view
+    _, version, _, count, etag_length, payload_length = _HEADER.unpack_from(view)
+    header = _HEADER.pack(MAGIC, version, time.time(), count, etag_length, payload_length)
+
+    with memoryview(view) as body:
+        _replace(path, header, body[_HEADER.size:])
+
+
+def _replace(path: str, *parts: bytes) -> None:
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as file:
+            for part in parts:
+                file.write(part)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_snapshot(path: str) -> Snapshot | None:
+    """Map the snapshot read-only. Returns None if it's missing or invalid.
+
+    The mapping stays open for as long as the returned records are referenced.
+    """
+    try:
+        with open(path, "rb") as file:
+            view = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable catalog snapshot {path}: {e}")
+        return None
+
+    try:
+        if len(view) < _HEADER.size:
+            raise ValueError("truncated header")
+
+        magic, version, created_at, count, etag_length, payload_length = _HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"unsupported format {magic!r} v{version}")
+
+        offsets_start = _HEADER.size + etag_length
+        payload_start = offsets_start + count * _OFFSET.size
+        if len(view) != payload_start + payload_length:
+            raise ValueError("truncated payload")
+
+        etag = view[_HEADER.size:offsets_start].decode("ascii") or None
+    except (UnicodeDecodeError, ValueError) as e:
+        view.close()
+        logger.warning(f"Ignoring unreadable catalog snapshot {path}: {e}")
+        return None
+
+    return Snapshot(MappedCatalog(view, count, offsets_start, payload_start, payload_length), created_at, etag)
+
+
+def prefill_snapshot(path: str, base_url: str, timeout: httpx.Timeout) -> int:
+    """Fetch the catalog synchronously and write the snapshot.
+
+    Meant for the gunicorn master (`on_starting`), before any worker or
+    event loop exists; it only needs httpx, not the app's services.
+
+    Returns:
+        int: Number of products written
+
+    Raises:
+        httpx.HTTPError: If the catalog can't be fetched
+    """
+    with httpx.Client(base_url=base_url, timeout=timeout) as client:
+        response = client.get("/products")
+        response.raise_for_status()
+        products = response.json()
+
+    write_snapshot(path, products, response.headers.get("etag"))
+
+    return len(products)
+
+
+@asynccontextmanager
+async def refresh_lock(path: str) -> AsyncIterator[None]:
+    """Hold an exclusive, cross-process lock on `<path>.lock`."""
+    fd = os.open(f"{path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            await asyncio.to_thread(fcntl.flock, fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        # Closing the descriptor releases the lock
+        os.close(fd)
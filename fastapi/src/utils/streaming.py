@@ -0,0 +1,61 @@
+"""Incremental encoding of large record lists.
+
+Records are encoded `chunk_size` at a time by async generators, so a
+streamed response never holds the whole encoded body in memory, the first
+records reach the client right away, and the event loop gets a turn
+between chunks instead of being blocked for the whole catalog.
+
+- `iter_ndjson`: one JSON document per line (`application/x-ndjson`)
+- `iter_json_array`: a regular JSON array, sent in chunks
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List
+
+from src.utils.responses import dumps
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+Record = Dict[str, Any]
+
+
+async def _iter_chunks(
+    records: Iterable[Record],
+    chunk_size: int,
+    encode_chunk: Callable[[List[Record], bool], bytes],
+) -> AsyncIterator[bytes]:
+    chunk: List[Record] = []
+    first = True
+
+    for record in records:
+        chunk.append(record)
+
+        if len(chunk) >= chunk_size:
+            yield encode_chunk(chunk, first)
+            chunk, first = [], False
+            # Let other requests run between chunks
+            await asyncio.sleep(0)
+
+    if chunk:
+        yield encode_chunk(chunk, first)
+
+
+async def iter_ndjson(records: Iterable[Record], chunk_size: int = 100) -> AsyncIterator[bytes]:
+    """Yield `records` as newline-delimited JSON, `chunk_size` records per chunk."""
+    async for chunk in _iter_chunks(
+        records, chunk_size, lambda chunk, _: b"".join(dumps(record) + b"\n" for record in chunk)
+    ):
+        yield chunk
+
+
+async def iter_json_array(records: Iterable[Record], chunk_size: int = 100) -> AsyncIterator[bytes]:
+    """Yield `records` as a JSON array, `chunk_size` records per chunk."""
+    empty = True
+
+    async for chunk in _iter_chunks(
+        records, chunk_size, lambda chunk, first: (b"[" if first else b",") + b",".join(map(dumps, chunk))
+    ):
+        empty = False
+        yield chunk
+
+    yield b"[]" if empty else b"]"
@@ -0,0 +1,117 @@
+"""Per-request phase timing.
+
+Usage:
+    from src.utils.timing import span, timed
+
+    with span("upstream"):
+        ...
+
+    @timed("validate")
+    def validate_fields(...): ...
+
+Spans are collected into a request-local `TimingRecorder` installed by
+`src.middleware.timing.ServerTimingMiddleware`, which emits them as a
+`Server-Timing` header and optionally as a structured log line. Outside a
+sampled request there is no recorder, and `span` returns a shared no-op
+context manager, so instrumented code costs a context variable lookup.
+"""
+
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from functools import wraps
+from inspect import iscoroutinefunction
+from typing import Any, Callable, Dict, List, Tuple
+
+_NULL_SPAN = nullcontext()
+
+_recorder: ContextVar["TimingRecorder | None"] = ContextVar("timing_recorder", default=None)
+
+
+class TimingRecorder:
+    __slots__ = ("spans", "started")
+
+    def __init__(self) -> None:
+        self.spans: List[Tuple[str, float]] = []
+        self.started = time.perf_counter()
+
+    def add(self, name: str, duration: float) -> None:
+        self.spans.append((name, duration))
+
+    def totals(self) -> Dict[str, Tuple[float, int]]:
+        """Return the summed duration (seconds) and count per span name."""
+        totals: Dict[str, Tuple[float, int]] = {}
+        for name, duration in self.spans:
+            total, count = totals.get(name, (0.0, 0))
+            totals[name] = (total + duration, count + 1)
+
+        return totals
+
+    def header_value(self) -> str:
+        """Render the spans as a Server-Timing header value (durations in ms)."""
+        metrics = []
+        for name, (total, count) in self.totals().items():
+            metric = f"{name};dur={total * 1000:.2f}"
+            if count > 1:
+                metric += f';desc="{count} calls"'
+            metrics.append(metric)
+
+        metrics.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.2f}")
+
+        return ", ".join(metrics)
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "started")
+
+    def __init__(self, recorder: TimingRecorder, name: str) -> None:
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self) -> "_Span":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        self.recorder.add(self.name, time.perf_counter() - self.started)
+
+
+def start_recording() -> Tuple[TimingRecorder, Any]:
+    """Install a recorder for the current request. Returns it and a reset token."""
+    recorder = TimingRecorder()
+
+    return recorder, _recorder.set(recorder)
+
+
+def stop_recording(token: Any) -> None:
+    _recorder.reset(token)
+
+
+def span(name: str):
+    """Time a block of code under `name` if the current request is sampled."""
+    recorder = _recorder.get()
+    if recorder is None:
+        return _NULL_SPAN
+
+    return _Span(recorder, name)
+
+
+def timed(name: str) -> Callable:
+    """Decorator version of `span` for sync and async functions."""
+    def decorator(func: Callable) -> Callable:
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
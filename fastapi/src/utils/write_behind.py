@@ -0,0 +1,358 @@
+"""Write-behind queue.
+
+Usage:
+    queue = WriteBehindQueue("carts", send=upstream_write, max_pending=1000)
+    queue.start()
+
+    async with queue.reserve(key):
+        ...  # write locally
+        await queue.submit(key, "PUT", "/carts/1", body)
+
+    await queue.drain(timeout=10)
+
+With an `outbox` (e.g. `src.services.cart_store.CartOutbox`):
+
+    queue = WriteBehindQueue("carts", send=upstream_write, outbox=outbox)
+    queue.start()
+    await queue.recover()  # writes left by a process that is gone
+
+- Writes are keyed (e.g. by cart): a write submitted while another one for
+  the same key is still pending replaces it, so only the latest state is
+  sent. A pending create (POST) stays a POST with the newer body.
+- Writes for one key are sent one at a time, in submission order; different
+  keys are sent concurrently by `concurrency` workers.
+- `reserve` waits while `max_pending` writes are queued (backpressure) and
+  raises `WriteQueueFull` after `enqueue_timeout`, before the caller writes
+  anything locally.
+- Failed writes are retried up to `max_attempts` times unless a newer write
+  for the same key replaced them (counted as superseded, not dropped).
+- With an `outbox`, `submit` returns once the (coalesced) write is stored
+  there, and a write is removed from it once sent or dropped, so writes
+  that were acknowledged survive a crash: `recover` queues again the ones
+  left by processes that have exited. The outbox keeps one write per key,
+  numbered, and only removes a write if it's still the latest one. Outbox
+  calls are made outside the queue lock, one at a time per key.
+"""
+
+import asyncio
+import os
+import socket
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Set, Tuple
+
+from src import metrics
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+Send = Callable[[str, str, Any], Awaitable[Any]]
+
+
+class WriteQueueFull(Exception):
+    """Raised when the queue stays full for longer than the enqueue timeout."""
+
+
+@dataclass
+class PendingWrite:
+    method: str
+    path: str
+    body: Any
+    attempts: int = 0
+    # Number of the write in the outbox, set once it's stored there
+    seq: int | None = None
+
+
+class Outbox(ABC):
+    """Durable copy of the pending writes of a `WriteBehindQueue`."""
+
+    @abstractmethod
+    async def put(self, key: Hashable, write: PendingWrite) -> int:
+        """Store `write` as the pending write of `key`, replacing the previous one. Returns its number."""
+
+    @abstractmethod
+    async def remove(self, key: Hashable, seq: int) -> None:
+        """Forget the pending write of `key` if it's still the one numbered `seq`."""
+
+    @abstractmethod
+    async def claim(self) -> List[Tuple[Hashable, PendingWrite]]:
+        """Take over the writes of processes that are gone, oldest first."""
+
+
+def process_owner() -> str:
+    """Identifies this process as the owner of the writes it puts in an outbox."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def owner_gone(owner: str) -> bool:
+    """Whether the process that owned some outbox writes has exited.
+
+    Only known for processes of this host; the writes of other hosts are
+    recovered when their own processes restart.
+    """
+    host, _, pid = owner.rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False
+
+    return False
+
+
+class WriteBehindQueue:
+    def __init__(
+        self,
+        name: str,
+        send: Send,
+        max_pending: int = 1000,
+        concurrency: int = 4,
+        max_attempts: int = 3,
+        retry_delay: float = 1.0,
+        enqueue_timeout: float = 5.0,
+        outbox: Outbox | None = None,
+    ) -> None:
+        self.name = name
+        self.max_pending = max_pending
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.enqueue_timeout = enqueue_timeout
+
+        self.sent = 0
+        self.coalesced = 0
+        self.retried = 0
+        self.dropped = 0
+        self.superseded = 0
+        self.recovered = 0
+
+        self._send = send
+        self._outbox = outbox
+        self._pending: OrderedDict[Hashable, PendingWrite] = OrderedDict()
+        self._in_flight: Set[Hashable] = set()
+        # Keys whose pending write is being stored in the outbox, not sent until it is
+        self._storing: Set[Hashable] = set()
+        self._reserved = 0
+        self._changed = asyncio.Condition()
+        self._workers: List[asyncio.Task] = []
+
+    def __len__(self) -> int:
+        return len(self._pending) + len(self._in_flight)
+
+    def start(self) -> None:
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    @asynccontextmanager
+    async def reserve(self, key: Hashable) -> AsyncIterator[None]:
+        """Hold a slot for a write to `key`, waiting while the queue is full."""
+        async with self._changed:
+            try:
+                await asyncio.wait_for(
+                    self._changed.wait_for(
+                        lambda: key in self._pending or len(self._pending) + self._reserved < self.max_pending
+                    ),
+                    self.enqueue_timeout,
+                )
+            except asyncio.TimeoutError:
+                raise WriteQueueFull(f"{self.name} write queue is full ({self.max_pending} pending)")
+            self._reserved += 1
+
+        try:
+            yield
+        finally:
+            async with self._changed:
+                self._reserved -= 1
+                self._changed.notify_all()
+
+    async def submit(self, key: Hashable, method: str, path: str, body: Any) -> None:
+        async with self._changed:
+            # One write of a key stored at a time, so the outbox keeps them in order
+            await self._changed.wait_for(lambda: key not in self._storing)
+            write = self._coalesce(key, PendingWrite(method, path, body))
+            self._pending[key] = write
+            if self._outbox is None:
+                self._changed.notify_all()
+                return
+            self._storing.add(key)
+
+        await self._stored(key, write)
+
+    async def recover(self) -> int:
+        """Queue the writes that processes now gone left in the outbox.
+
+        Returns:
+            int: Number of writes recovered
+        """
+        if self._outbox is None:
+            return 0
+
+        writes = await self._outbox.claim()
+        async with self._changed:
+            for key, write in writes:
+                # Anything already submitted for the key is newer
+                if key not in self._pending and key not in self._in_flight:
+                    self._pending[key] = write
+            self._changed.notify_all()
+
+        self.recovered += len(writes)
+        if writes:
+            logger.info(f"Recovered {len(writes)} {self.name} writes from the outbox")
+
+        return len(writes)
+
+    async def drain(self, timeout: float) -> int:
+        """Wait for queued writes to be sent, then stop the workers.
+
+        Returns:
+            int: Number of writes not sent because the timeout expired (kept
+                in the outbox when there is one, dropped otherwise)
+        """
+        try:
+            async with self._changed:
+                await asyncio.wait_for(self._changed.wait_for(lambda: len(self) == 0), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+        unsent = len(self)
+        if unsent and self._outbox is not None:
+            logger.warning(f"{unsent} {self.name} writes not sent in time, left in the outbox")
+        elif unsent:
+            self.dropped += unsent
+            logger.warning(f"Dropping {unsent} {self.name} writes not sent in time")
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        return unsent
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "inFlight": len(self._in_flight),
+            "maxPending": self.max_pending,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "retried": self.retried,
+            "dropped": self.dropped,
+            "superseded": self.superseded,
+            "recovered": self.recovered,
+            "durable": self._outbox is not None,
+        }
+
+    def _coalesce(self, key: Hashable, write: PendingWrite) -> PendingWrite:
+        queued = self._pending.get(key)
+        if queued is None:
+            return write
+
+        self.coalesced += 1
+        metrics.record_write_behind(self.name, "coalesced")
+        if queued.method == "POST":
+            # The create hasn't been sent yet: send it with the newer body
+            return PendingWrite(queued.method, queued.path, write.body)
+
+        return write
+
+    async def _store(self, key: Hashable, write: PendingWrite) -> None:
+        if self._outbox is None:
+            return
+
+        try:
+            write.seq = await self._outbox.put(key, write)
+        except Exception as e:
+            # The local write is already committed: keep the write in memory rather than fail it
+            logger.error(f"Could not store {self.name} write {write.method} {write.path} in the outbox: {e!r}")
+
+    async def _stored(self, key: Hashable, write: PendingWrite) -> None:
+        """Store `write` for `key`, which is in `_storing`, without holding the lock."""
+        try:
+            await self._store(key, write)
+        finally:
+            async with self._changed:
+                self._storing.discard(key)
+                self._changed.notify_all()
+
+    async def _forget(self, key: Hashable, write: PendingWrite) -> None:
+        if self._outbox is None or write.seq is None:
+            return
+
+        try:
+            await self._outbox.remove(key, write.seq)
+        except Exception as e:
+            # Sent again after a restart, which only repeats the same state
+            logger.warning(f"Could not remove {self.name} write {write.method} {write.path} from the outbox: {e!r}")
+
+    async def _next(self) -> Tuple[Hashable, PendingWrite]:
+        async with self._changed:
+            while True:
+                # Oldest write whose key has no write in flight, to keep per-key order
+                for key in self._pending:
+                    if key not in self._in_flight and key not in self._storing:
+                        self._in_flight.add(key)
+                        self._changed.notify_all()
+                        return key, self._pending.pop(key)
+
+                await self._changed.wait()
+
+    async def _work(self) -> None:
+        while True:
+            key, write = await self._next()
+            try:
+                await self._send(write.method, write.path, write.body)
+            except Exception as e:
+                write.attempts += 1
+                logger.warning(f"{self.name} write {write.method} {write.path} failed (attempt {write.attempts}): {e!r}")
+                # Back off before the key is released, so its retry isn't picked up right away
+                await asyncio.sleep(self.retry_delay)
+                await self._failed(key, write)
+            else:
+                self.sent += 1
+                metrics.record_write_behind(self.name, "sent")
+                await self._forget(key, write)
+
+            async with self._changed:
+                self._in_flight.discard(key)
+                self._changed.notify_all()
+
+    async def _failed(self, key: Hashable, write: PendingWrite) -> None:
+        """Retry, drop or hand over a failed write, while its key is still in flight."""
+        async with self._changed:
+            # A write submitted meanwhile is final once stored
+            await self._changed.wait_for(lambda: key not in self._storing)
+            pending = self._pending.get(key)
+
+            if pending is None and write.attempts < self.max_attempts:
+                self.retried += 1
+                metrics.record_write_behind(self.name, "retried")
+                self._pending[key] = write
+                self._pending.move_to_end(key, last=False)
+                return
+
+            if pending is not None and write.method != "POST":
+                # The newer write carries the latest state, nothing is lost
+                self.superseded += 1
+                metrics.record_write_behind(self.name, "superseded")
+                logger.info(f"{self.name} write {write.method} {write.path} failed, superseded by a newer write")
+                return
+
+            if pending is not None:
+                # A newer write replaced a create that never reached upstream: send it as the create
+                pending.method, pending.path = write.method, write.path
+                self._storing.add(key)
+            else:
+                self.dropped += 1
+                metrics.record_write_behind(self.name, "dropped")
+                logger.error(f"Dropping {self.name} write {write.method} {write.path} after {write.attempts} attempts")
+
+        if pending is not None:
+            await self._stored(key, pending)
+        else:
+            await self._forget(key, write)
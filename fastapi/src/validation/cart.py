@@ -1,103 +1,124 @@
 """Cart validation functions."""
 
+from functools import lru_cache
 from typing import Any, List, Dict
 from fastapi import HTTPException, status
+from src.utils.projection import CART_FIELDS
+from src.utils.timing import timed
+from src.validation.common import fields_check, flag_check, id_check
+from src.validation.engine import Check, Field, RequestSpec, to_int
+from src.validation.product import product_ids_check
 
+check_cart_id = id_check("Cart")
 
-def validate_cart_id(cart_id: Any) -> int | str:
-    """Validate cart ID with LLM-friendly error messages."""
-    if cart_id is None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cart ID is required. Please provide a valid cart ID as an integer (e.g., 1, 2, 3) or string (e.g., '1', '2', '3')."
-        )
-
-    if not isinstance(cart_id, (int, str)):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Cart ID must be an integer or string. Please provide a valid cart ID like 1 or '1'."
-        )
-
-    return cart_id
-
-
-def validate_products(products: Any) -> List[Dict[str, Any]]:
-    """Validate products list with general, LLM-friendly error messages."""
-    if not isinstance(products, list):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="The 'products' field must be an array of product objects. Please provide products as: [{\"id\": 1, \"quantity\": 2}, {\"id\": 2, \"quantity\": 1}]"
-        )
-
-    validated_products = []
-    has_format_errors = False
-    has_id_errors = False
-    has_quantity_errors = False
-
-    for product in products:
-        if not isinstance(product, dict):
-            has_format_errors = True
-            continue
-
-        # Validate product ID
-        if "id" not in product:
-            has_id_errors = True
-        else:
-            product_id = product["id"]
-            if not isinstance(product_id, (int, str)):
-                has_id_errors = True
-            else:
-                try:
-                    int(product_id)
-                except ValueError:
-                    has_id_errors = True
-
-        # Validate quantity if provided
-        if "quantity" in product:
-            quantity = product["quantity"]
-            if not isinstance(quantity, (int, str)):
-                has_quantity_errors = True
-            else:
-                try:
-                    validated_quantity = int(quantity)
-                    if validated_quantity < 1:
-                        has_quantity_errors = True
-                except ValueError:
-                    has_quantity_errors = True
-
-        # If no errors for this product, add it to validated products
-        if (isinstance(product, dict) and 
-            "id" in product and 
-            isinstance(product["id"], (int, str)) and
-            str(product["id"]).isdigit() and
-            ("quantity" not in product or 
-             (isinstance(product["quantity"], (int, str)) and 
-              str(product["quantity"]).isdigit() and 
-              int(product["quantity"]) >= 1))):
-            
-            validated_product = {"id": int(product["id"])}
-            if "quantity" in product:
-                validated_product["quantity"] = int(product["quantity"])
-            validated_products.append(validated_product)
-
-    # Provide general guidance based on error types found
-    error_messages = []
-    
-    if has_format_errors:
-        error_messages.append("Some products are not properly formatted. Each product must be an object with an 'id' field.")
-    
-    if has_id_errors:
-        error_messages.append("Some products have invalid IDs. Product IDs must be positive integers (e.g., 1, 2, 3).")
-    
-    if has_quantity_errors:
-        error_messages.append("Some products have invalid quantities. Quantities must be positive integers (1 or greater).")
-
-    if error_messages:
-        guidance = " Please ensure all products follow this format: {\"id\": 1, \"quantity\": 2} where 'id' is a positive integer and 'quantity' is optional but must be 1 or greater if provided."
-        error_detail = "There are issues with the products in your request. " + " ".join(error_messages) + guidance
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=error_detail
-        )
-
-    return validated_products
+_FORMAT_ERROR, _ID_ERROR, _QUANTITY_ERROR = 1, 2, 4
+
+
+@lru_cache(maxsize=None)
+def products_check(min_quantity: int = 1, require_quantity: bool = False) -> Check:
+    """Compile a validator for a products list ([{"id": 1, "quantity": 2}, ...]).
+
+    Every product is checked and normalized in a single pass; problems are
+    collected by kind and reported together with general guidance.
+
+    Args:
+        min_quantity: Lowest accepted quantity (0 lets set_quantity remove lines)
+        require_quantity: Whether every product must have a quantity
+    """
+    type_detail = "The 'products' field must be an array of product objects. Please provide products as: [{\"id\": 1, \"quantity\": 2}, {\"id\": 2, \"quantity\": 1}]"
+    messages = (
+        (_FORMAT_ERROR, "Some products are not properly formatted. Each product must be an object with an 'id' field."),
+        (_ID_ERROR, "Some products have invalid IDs. Product IDs must be positive integers (e.g., 1, 2, 3)."),
+        (_QUANTITY_ERROR, f"Some products have invalid quantities. Quantities must be integers of {min_quantity} or greater{' and are required' if require_quantity else ''}."),
+    )
+    quantity_rule = "required" if require_quantity else "optional"
+    guidance = f" Please ensure all products follow this format: {{\"id\": 1, \"quantity\": 2}} where 'id' is a positive integer and 'quantity' is {quantity_rule} and must be {min_quantity} or greater."
+
+    def check(products: Any) -> List[Dict[str, Any]]:
+        if type(products) is not list:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=type_detail)
+
+        validated_products = []
+        errors = 0
+
+        for product in products:
+            if type(product) is not dict:
+                errors |= _FORMAT_ERROR
+                continue
+
+            product_id = to_int(product.get("id"))
+            if product_id is None:
+                errors |= _ID_ERROR
+
+            quantity = product.get("quantity")
+            if quantity is None and "quantity" not in product:
+                if require_quantity:
+                    errors |= _QUANTITY_ERROR
+                elif product_id is not None:
+                    validated_products.append({"id": product_id})
+                continue
+
+            quantity = to_int(quantity, min_quantity)
+            if quantity is None:
+                errors |= _QUANTITY_ERROR
+            elif product_id is not None:
+                validated_products.append({"id": product_id, "quantity": quantity})
+
+        if errors:
+            error_messages = [message for error, message in messages if errors & error]
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="There are issues with the products in your request. " + " ".join(error_messages) + guidance
+            )
+
+        return validated_products
+
+    return check
+
+
+GET_CART_REQUEST = RequestSpec(
+    Field("cartId", check_cart_id, example='{"cartId": 1}'),
+    Field("fields", fields_check(CART_FIELDS)),
+    Field("compact", flag_check("compact"), default=False),
+    Field("enrich", flag_check("enrich"), default=False),
+)
+
+MANAGE_CART_REQUEST = RequestSpec(
+    Field("products", products_check(), example='{"products": [{"id": 1, "quantity": 2}]}'),
+    Field("cartId", check_cart_id),
+)
+
+ADD_TO_CART_REQUEST = RequestSpec(
+    Field("products", products_check(), example='{"cartId": 1, "products": [{"id": 5, "quantity": 2}]}'),
+    Field("cartId", check_cart_id),
+)
+
+REMOVE_FROM_CART_REQUEST = RequestSpec(
+    Field("cartId", check_cart_id, example='{"cartId": 1, "productIds": [5, 7]}'),
+    Field("productIds", product_ids_check("productIds"), example='{"cartId": 1, "productIds": [5, 7]}'),
+)
+
+SET_QUANTITY_REQUEST = RequestSpec(
+    Field("cartId", check_cart_id, example='{"cartId": 1, "products": [{"id": 5, "quantity": 3}]}'),
+    Field(
+        "products",
+        products_check(min_quantity=0, require_quantity=True),
+        example='{"cartId": 1, "products": [{"id": 5, "quantity": 3}]}',
+    ),
+)
+
+
+@timed("validate")
+def validate_products(
+    products: Any,
+    min_quantity: int = 1,
+    require_quantity: bool = False,
+) -> List[Dict[str, Any]]:
+    """Validate products list with general, LLM-friendly error messages.
+
+    Args:
+        products: The products list from the request body
+        min_quantity: Lowest accepted quantity (0 lets set_quantity remove lines)
+        require_quantity: Whether every product must have a quantity
+    """
+    return products_check(min_quantity, require_quantity)(products)
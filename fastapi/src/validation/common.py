@@ -1,9 +1,18 @@
-"""Common validation functions."""
+"""Common validation functions.
 
-from typing import Dict, Any
+The `*_check` factories compile a validator once (see
+`src.validation.engine`); the `validate_*` functions are shortcuts for
+one-off calls.
+"""
+
+from functools import lru_cache
+from typing import Dict, Any, List, Sequence
 from fastapi import HTTPException, status, Request
+from src.utils.timing import timed
+from src.validation.engine import Check
 
 
+@timed("parse")
 async def parse_request_body(request: Request) -> Dict[str, Any]:
     """Parse request body with LLM-friendly error messages."""
     try:
@@ -24,4 +33,85 @@ async def parse_request_body(request: Request) -> Dict[str, Any]:
             detail="The request body must be a JSON object with key-value pairs. Please provide data as: {\"key\": \"value\"} instead of arrays or other formats."
         )
 
-    return body
\ No newline at end of file
+    return body
+
+
+@lru_cache(maxsize=None)
+def fields_check(allowed: Sequence[str]) -> Check:
+    """Compile a field projection validator (list of names or comma separated string)."""
+    allowed_set = frozenset(allowed)
+    available = ", ".join(allowed)
+    invalid_detail = f"The 'fields' field must be a non-empty list of field names, for example: [\"id\", \"title\", \"price\"]. Available fields: {available}."
+
+    def check(fields: Any) -> List[str] | None:
+        if fields is None:
+            return None
+
+        if type(fields) is str:
+            fields = [field.strip() for field in fields.split(",") if field.strip()]
+
+        if not isinstance(fields, list) or not fields or not all(isinstance(field, str) for field in fields):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=invalid_detail)
+
+        unknown = [field for field in fields if field not in allowed_set]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(unknown)}. Available fields: {available}."
+            )
+
+        return list(dict.fromkeys(fields))
+
+    return check
+
+
+@lru_cache(maxsize=None)
+def flag_check(field: str) -> Check:
+    """Compile an optional boolean flag (e.g. compact) validator."""
+    detail = f"The '{field}' field must be true or false. Example: {{\"{field}\": true}}"
+
+    def check(value: Any) -> bool:
+        if value is None:
+            return False
+
+        if value is True or value is False:
+            return value
+
+        if isinstance(value, str):
+            lowered = value.lower()
+            if lowered == "true" or lowered == "false":
+                return lowered == "true"
+
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+    return check
+
+
+@lru_cache(maxsize=None)
+def id_check(label: str) -> Check:
+    """Compile a required id validator (e.g. label "Cart"); ids are kept as given, int or str."""
+    missing_detail = f"{label} ID is required. Please provide a valid {label.lower()} ID as an integer (e.g., 1, 2, 3) or string (e.g., '1', '2', '3')."
+    type_detail = f"{label} ID must be an integer or string. Please provide a valid {label.lower()} ID like 1 or '1'."
+
+    def check(value: Any) -> int | str:
+        if value is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=missing_detail)
+
+        # bool is an int subclass, but true isn't ID 1
+        cls = type(value)
+        if cls is not int and cls is not str:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=type_detail)
+
+        return value
+
+    return check
+
+
+@timed("validate")
+def validate_fields(fields: Any, allowed: Sequence[str]) -> List[str] | None:
+    """Validate a field projection with LLM-friendly error messages.
+
+    Accepts a list of field names or a comma separated string.
+    """
+    return fields_check(tuple(allowed))(fields)
+
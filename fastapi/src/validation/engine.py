@@ -0,0 +1,84 @@
+"""Single-pass request validation.
+
+Each route declares its request once, at import time, as a `RequestSpec` of
+`Field`s. A field's checker is a closure built by the domain modules
+(`src.validation.common`, `.cart`, `.product`) with its error messages
+already formatted, so validating a request is one lookup and one call per
+field, with no model instance built in between:
+
+    GET_CART_REQUEST = RequestSpec(
+        Field("cartId", check_cart_id, example='{"cartId": 1}'),
+        Field("fields", check_cart_fields),
+        Field("compact", check_compact, default=False),
+    )
+
+    values = GET_CART_REQUEST.validate(body)  # {"cartId": 1, "fields": None, "compact": False}
+
+Required fields are checked first, in declaration order, with the same
+"Missing required field" message as `validate_required_field`; then each
+present field is checked and normalized. Optional fields that are missing
+or null get their default without being checked.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Tuple
+
+from fastapi import HTTPException, status
+
+from src.utils.timing import timed
+
+Check = Callable[[Any], Any]
+
+
+@dataclass(frozen=True)
+class Field:
+    name: str
+    check: Check
+    # Set for required fields: example body shown when the field is missing
+    example: str | None = None
+    default: Any = None
+
+
+class RequestSpec:
+    def __init__(self, *fields: Field) -> None:
+        self.fields = fields
+
+        self._required: Tuple[Tuple[str, str], ...] = tuple(
+            (field.name, f"Missing required field: {field.name}. Example: {field.example}")
+            for field in fields if field.example is not None
+        )
+        self._checks: Tuple[Tuple[str, Check, bool, Any], ...] = tuple(
+            (field.name, field.check, field.example is not None, field.default) for field in fields
+        )
+
+    @timed("validate")
+    def validate(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the normalized value of every declared field.
+
+        Raises:
+            HTTPException: 400 with an LLM-friendly message on the first invalid field
+        """
+        for name, detail in self._required:
+            if name not in body:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+        values = {}
+        for name, check, required, default in self._checks:
+            value = body.get(name)
+            values[name] = check(value) if required or value is not None else default
+
+        return values
+
+
+def to_int(value: Any, minimum: int = 1) -> int | None:
+    """`value` as an int if it's an integer (or a string of ASCII digits) of at least `minimum`, else None."""
+    cls = type(value)
+
+    if cls is int:
+        return value if value >= minimum else None
+
+    if cls is str and value.isascii() and value.isdigit():
+        number = int(value)
+        return number if number >= minimum else None
+
+    return None
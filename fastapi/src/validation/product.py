@@ -1,21 +1,172 @@
 """Product validation functions."""
 
-from typing import Any
+from functools import lru_cache
+from typing import Any, Dict, List
 from fastapi import HTTPException, status
+from src.services.catalog import SORT_KEYS
+from src.utils.projection import PRODUCT_FIELDS
+from src.utils.timing import timed
+from src.validation.common import fields_check, flag_check, id_check
+from src.validation.engine import Check, Field, RequestSpec, to_int
 
+DEFAULT_SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 50
+MAX_BATCH_IDS = 50
 
-def validate_product_id(product_id: Any) -> int | str:
-    """Validate product ID with LLM-friendly error messages."""
-    if product_id is None:
+
+check_product_id = id_check("Product")
+
+
+def check_product_path_id(product_id: str) -> int:
+    """Validate a product ID given in the URL path: unlike request bodies, only positive integers."""
+    validated_id = to_int(product_id)
+    if validated_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Product ID must be a positive integer, got {product_id!r}. Example: /products/1"
+        )
+
+    return validated_id
+
+
+@lru_cache(maxsize=None)
+def product_ids_check(field: str = "ids") -> Check:
+    """Compile a validator for a list of product IDs.
+
+    IDs are returned in the requested order, duplicates included, so
+    results can be matched to request positions.
+    `field` is the request field name used in the error messages.
+    """
+    type_detail = f"The '{field}' field must be a non-empty array of product IDs. Please provide IDs as: {{\"{field}\": [1, 2, 3]}}"
+    size_detail = f"Too many product IDs. Please request at most {MAX_BATCH_IDS} products at a time."
+    invalid_guidance = f"Product IDs must be positive integers (e.g., 1, 2, 3). Please provide IDs as: {{\"{field}\": [1, 2, 3]}}"
+
+    def check(product_ids: Any) -> List[int]:
+        if type(product_ids) is not list or not product_ids:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=type_detail)
+
+        if len(product_ids) > MAX_BATCH_IDS:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=size_detail)
+
+        validated_ids = []
+        invalid_ids = []
+
+        for product_id in product_ids:
+            validated_id = to_int(product_id.strip() if type(product_id) is str else product_id)
+            if validated_id is None:
+                invalid_ids.append(product_id)
+            else:
+                validated_ids.append(validated_id)
+
+        if invalid_ids:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Some product IDs are invalid: {', '.join(repr(i) for i in invalid_ids[:5])}. {invalid_guidance}"
+            )
+
+        return validated_ids
+
+    return check
+
+
+GET_PRODUCT_REQUEST = RequestSpec(
+    Field("id", check_product_id, example='{"id": 1}'),
+    Field("fields", fields_check(PRODUCT_FIELDS)),
+    Field("compact", flag_check("compact"), default=False),
+)
+
+GET_PRODUCTS_REQUEST = RequestSpec(
+    Field("ids", product_ids_check("ids"), example='{"ids": [1, 2, 3]}'),
+    Field("fields", fields_check(PRODUCT_FIELDS)),
+    Field("compact", flag_check("compact"), default=False),
+)
+
+
+@timed("validate")
+def validate_product_path_id(product_id: str) -> int:
+    """Validate a product ID path parameter with LLM-friendly error messages."""
+    return check_product_path_id(product_id)
+
+
+@timed("validate")
+def validate_search_request(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate search criteria with LLM-friendly error messages.
+
+    Returns the keyword arguments for `CatalogIndex.search`.
+    """
+    query = body.get("query")
+    if query is not None and not isinstance(query, str):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Product ID is required. Please provide a valid product ID as an integer (e.g., 1, 2, 3) or string (e.g., '1', '2', '3')."
+            detail="The 'query' field must be a text string. Please provide search words like: {\"query\": \"cotton jacket\"}"
         )
 
-    if not isinstance(product_id, (int, str)):
+    category = body.get("category")
+    if category is not None and not isinstance(category, str):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The 'category' field must be a text string. Please provide a category like: {\"category\": \"electronics\"}"
+        )
+
+    min_price = _validate_number(body.get("minPrice"), "minPrice", 0)
+    max_price = _validate_number(body.get("maxPrice"), "maxPrice", 0)
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The 'minPrice' must be lower than or equal to 'maxPrice'. Please provide a valid price range like: {\"minPrice\": 10, \"maxPrice\": 50}"
+        )
+
+    min_rating = _validate_number(body.get("minRating"), "minRating", 0, 5)
+
+    sort = body.get("sort") or "relevance"
+    if sort not in SORT_KEYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"The 'sort' field must be one of: {', '.join(SORT_KEYS)}. Example: {{\"sort\": \"price_asc\"}}"
+        )
+
+    limit = body.get("limit", DEFAULT_SEARCH_LIMIT)
+    if isinstance(limit, bool) or not str(limit).isdigit() or not 1 <= int(limit) <= MAX_SEARCH_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"The 'limit' field must be an integer between 1 and {MAX_SEARCH_LIMIT}. Example: {{\"limit\": 10}}"
+        )
+
+    cursor = body.get("cursor")
+    if cursor is not None and (isinstance(cursor, bool) or not str(cursor).isdigit()):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The 'cursor' field is invalid. Please pass the 'nextCursor' value returned by the previous search, or omit it to get the first page."
+        )
+
+    return {
+        "query": (query.strip() or None) if query else None,
+        "category": (category.strip() or None) if category else None,
+        "min_price": min_price,
+        "max_price": max_price,
+        "min_rating": min_rating,
+        "sort": sort,
+        "offset": int(cursor) if cursor is not None else 0,
+        "limit": int(limit),
+    }
+
+
+def _validate_number(value: Any, field: str, minimum: float, maximum: float | None = None) -> float | None:
+    if value is None:
+        return None
+
+    try:
+        if isinstance(value, bool):
+            raise ValueError
+        number = float(value)
+    except (TypeError, ValueError):
+        number = None
+
+    if number is None or number < minimum or (maximum is not None and number > maximum):
+        bounds = f"between {minimum} and {maximum}" if maximum is not None else f"{minimum} or greater"
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Product ID must be an integer or string. Please provide a valid product ID like 1 or '1'."
+            detail=f"The '{field}' field must be a number {bounds}. Example: {{\"{field}\": {maximum or 10}}}"
         )
 
-    return product_id
\ No newline at end of file
+    return number
@@ -0,0 +1,120 @@
+"""Worker warm-up.
+
+Started in the background from the lifespan, so the worker accepts
+connections right away while `/healthcheck/ready` reports it unready until
+every step has run:
+
+- catalog: load the catalog (from the shared snapshot or upstream) and
+  build the search index
+- openapi: build the OpenAPI schema and encode it once, with its
+  compressed variants, so `/openapi.json` is served without serializing
+  it again (see `openapi_payload`)
+- routes: call the MCP-facing routes once in-process, so the first agent
+  request doesn't pay for first-call imports and code paths
+
+MCP tools are generated when `FastApiMCP` is created at import time, before
+the worker serves anything; the tool list is then serialized by the MCP SDK
+for each `tools/list` message, which fastapi-mcp offers no hook to replace
+with pre-encoded bytes. A failed step is logged and doesn't keep the
+worker unready: it will load lazily on the first request instead.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict
+
+import httpx
+from fastapi import FastAPI
+
+from src.config import settings
+from src.logger import get_logger
+from src.services import product as product_service
+from src.utils.compression import AVAILABLE_ENCODINGS
+from src.utils.responses import EncodedJSON
+
+logger = get_logger(__name__)
+
+# MCP-facing requests replayed in-process during warm-up
+WARMUP_REQUESTS = (
+    ("GET", "/products", {"params": {"fields": "id", "compact": "true"}}),
+    ("POST", "/products/single-product", {"json": {"id": 1, "compact": True}}),
+    ("POST", "/products/search", {"json": {"query": "warmup", "limit": 1}}),
+)
+
+
+@dataclass
+class WarmupState:
+    ready: bool = False
+    started_at: float | None = None
+    duration: float | None = None
+    steps: Dict[str, str] = field(default_factory=dict)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "durationMs": round(self.duration * 1000, 1) if self.duration is not None else None,
+            "steps": dict(self.steps),
+        }
+
+
+state = WarmupState()
+
+_openapi: EncodedJSON | None = None
+
+
+def openapi_payload(app: FastAPI) -> EncodedJSON:
+    """The OpenAPI schema, encoded on first use (normally during warm-up)."""
+    global _openapi
+
+    if _openapi is None:
+        _openapi = EncodedJSON.encode(app.openapi())
+
+    return _openapi
+
+
+async def warm_up(app: FastAPI) -> None:
+    """Run every warm-up step concurrently, then mark the worker ready."""
+    if not settings.WARMUP_ENABLED:
+        state.ready = True
+        return
+
+    state.started_at = time.monotonic()
+
+    steps: Dict[str, Callable[[], Awaitable[Any]]] = {
+        "catalog": product_service.get_catalog_index,
+        "openapi": lambda: _build_openapi(app),
+        "routes": lambda: _replay_requests(app),
+    }
+    results = await asyncio.gather(
+        *(asyncio.wait_for(step(), settings.WARMUP_TIMEOUT_SECONDS) for step in steps.values()),
+        return_exceptions=True,
+    )
+
+    for name, result in zip(steps, results):
+        if isinstance(result, BaseException):
+            state.steps[name] = f"failed: {result!r}"
+            logger.warning(f"Warm-up step {name} failed: {result!r}")
+        else:
+            state.steps[name] = "ok"
+
+    state.duration = time.monotonic() - state.started_at
+    state.ready = True
+    logger.info(f"Worker warmed up in {state.duration * 1000:.0f}ms")
+
+
+async def _build_openapi(app: FastAPI) -> None:
+    payload = openapi_payload(app)
+
+    if settings.COMPRESSION_ENABLED:
+        for encoding in AVAILABLE_ENCODINGS:
+            payload.variant(encoding)
+
+
+async def _replay_requests(app: FastAPI) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://warmup") as client:
+        for method, path, kwargs in WARMUP_REQUESTS:
+            response = await client.request(method, path, **kwargs)
+            if response.status_code >= 500:
+                raise RuntimeError(f"{method} {path} answered {response.status_code}")
@@ -0,0 +1,258 @@
+import asyncio
+from typing import Any, List, Tuple
+
+import pytest
+
+from src.services.cart_store import CartOutbox, MemoryCartStore, SQLiteCartStore
+from src.utils.write_behind import Outbox, PendingWrite, WriteBehindQueue, WriteQueueFull
+
+Call = Tuple[str, str, Any]
+
+
+class Upstream:
+    """Records sent writes; `gate` holds them until set, `failures` makes the first ones fail."""
+
+    def __init__(self, failures: int = 0) -> None:
+        self.calls: List[Call] = []
+        self.started = asyncio.Event()
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.failures = failures
+
+    async def send(self, method: str, path: str, body: Any) -> None:
+        self.started.set()
+        await self.gate.wait()
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("upstream down")
+        self.calls.append((method, path, body))
+
+
+def make_queue(upstream: Upstream, **kwargs: Any) -> WriteBehindQueue:
+    kwargs.setdefault("retry_delay", 0)
+    kwargs.setdefault("enqueue_timeout", 0.05)
+
+    return WriteBehindQueue("test", send=upstream.send, **kwargs)
+
+
+def test_coalesces_pending_writes_of_a_key():
+    async def scenario():
+        upstream = Upstream()
+        queue = make_queue(upstream)
+
+        for version in (1, 2, 3):
+            await queue.submit("cart", "PUT", "/carts/1", {"v": version})
+        await queue.submit("other", "PUT", "/carts/2", {"v": 1})
+        queue.start()
+        await queue.drain(timeout=1)
+
+        assert upstream.calls == [("PUT", "/carts/1", {"v": 3}), ("PUT", "/carts/2", {"v": 1})]
+        assert queue.coalesced == 2
+        assert queue.sent == 2
+
+    asyncio.run(scenario())
+
+
+def test_pending_create_stays_a_create():
+    async def scenario():
+        upstream = Upstream()
+        queue = make_queue(upstream)
+
+        await queue.submit("cart", "POST", "/carts", {"v": 1})
+        await queue.submit("cart", "PUT", "/carts/1000", {"v": 2})
+        queue.start()
+        await queue.drain(timeout=1)
+
+        assert upstream.calls == [("POST", "/carts", {"v": 2})]
+
+    asyncio.run(scenario())
+
+
+def test_keeps_order_per_key_and_sends_other_keys_meanwhile():
+    async def scenario():
+        upstream = Upstream()
+        upstream.gate.clear()
+        queue = make_queue(upstream, concurrency=2)
+        queue.start()
+
+        await queue.submit("cart", "PUT", "/carts/1", {"v": 1})
+        await upstream.started.wait()
+        # v1 is in flight: v2 waits for it, another key doesn't
+        await queue.submit("cart", "PUT", "/carts/1", {"v": 2})
+        await queue.submit("other", "PUT", "/carts/2", {"v": 1})
+        await asyncio.sleep(0.01)
+        assert queue.snapshot()["inFlight"] == 2
+
+        upstream.gate.set()
+        await queue.drain(timeout=1)
+
+        assert [call[2] for call in upstream.calls if call[1] == "/carts/1"] == [{"v": 1}, {"v": 2}]
+        assert queue.coalesced == 0
+
+    asyncio.run(scenario())
+
+
+def test_reserve_applies_backpressure_when_full():
+    async def scenario():
+        queue = make_queue(Upstream(), max_pending=1)
+
+        async with queue.reserve("cart"):
+            await queue.submit("cart", "PUT", "/carts/1", {"v": 1})
+
+        with pytest.raises(WriteQueueFull):
+            async with queue.reserve("other"):
+                pass
+
+        # A write that will coalesce with a pending one takes no new slot
+        async with queue.reserve("cart"):
+            await queue.submit("cart", "PUT", "/carts/1", {"v": 2})
+
+        assert len(queue) == 1
+
+    asyncio.run(scenario())
+
+
+def test_retries_then_drops_failed_writes():
+    async def scenario():
+        upstream = Upstream(failures=1)
+        queue = make_queue(upstream, max_attempts=2)
+        queue.start()
+
+        await queue.submit("cart", "PUT", "/carts/1", {"v": 1})
+        await queue.drain(timeout=1)
+        assert (queue.retried, queue.sent, queue.dropped) == (1, 1, 0)
+
+        upstream.failures = 2
+        queue.start()
+        await queue.submit("cart", "PUT", "/carts/1", {"v": 2})
+        await queue.drain(timeout=1)
+        assert (queue.retried, queue.sent, queue.dropped) == (2, 1, 1)
+
+    asyncio.run(scenario())
+
+
+def test_failed_write_replaced_by_a_newer_one_is_superseded():
+    async def scenario():
+        upstream = Upstream(failures=1)
+        upstream.gate.clear()
+        queue = make_queue(upstream)
+        queue.start()
+
+        await queue.submit("cart", "PUT", "/carts/1", {"v": 1})
+        await upstream.started.wait()
+        # v1 is in flight and about to fail: v2 replaces it
+        await queue.submit("cart", "PUT", "/carts/1", {"v": 2})
+        upstream.gate.set()
+        await queue.drain(timeout=1)
+
+        assert upstream.calls == [("PUT", "/carts/1", {"v": 2})]
+        assert (queue.superseded, queue.dropped, queue.retried) == (1, 0, 0)
+
+    asyncio.run(scenario())
+
+
+def test_outbox_writes_dont_block_other_keys():
+    class SlowOutbox(Outbox):
+        def __init__(self) -> None:
+            self.gate = asyncio.Event()
+            self.seq = 0
+
+        async def put(self, key, write):
+            if key == "slow":
+                await self.gate.wait()
+            self.seq += 1
+            return self.seq
+
+        async def remove(self, key, seq):
+            pass
+
+        async def claim(self):
+            return []
+
+    async def scenario():
+        outbox = SlowOutbox()
+        upstream = Upstream()
+        queue = make_queue(upstream, outbox=outbox)
+        queue.start()
+
+        slow = asyncio.create_task(queue.submit("slow", "PUT", "/carts/1", {"v": 1}))
+        await asyncio.sleep(0.01)
+        await asyncio.wait_for(queue.submit("other", "PUT", "/carts/2", {"v": 1}), 0.5)
+        await asyncio.sleep(0.01)
+        # Not sent before it's stored
+        assert upstream.calls == [("PUT", "/carts/2", {"v": 1})]
+
+        outbox.gate.set()
+        await slow
+        await queue.drain(timeout=1)
+        assert ("PUT", "/carts/1", {"v": 1}) in upstream.calls
+
+    asyncio.run(scenario())
+
+
+def test_drain_reports_writes_not_sent_in_time():
+    async def scenario():
+        upstream = Upstream()
+        upstream.gate.clear()
+        queue = make_queue(upstream)
+        queue.start()
+
+        await queue.submit("cart", "PUT", "/carts/1", {"v": 1})
+        await queue.submit("other", "PUT", "/carts/2", {"v": 1})
+
+        assert await queue.drain(timeout=0.05) == 2
+        assert queue.dropped == 2
+        assert queue.snapshot()["durable"] is False
+
+    asyncio.run(scenario())
+
+
+def test_outbox_keeps_acknowledged_writes_until_sent():
+    async def scenario():
+        store = MemoryCartStore()
+        upstream = Upstream()
+        upstream.gate.clear()
+        queue = make_queue(upstream, outbox=CartOutbox(store))
+        queue.start()
+
+        await queue.submit((1, 1000), "POST", "/carts", {"v": 1})
+        await queue.submit((1, 1000), "PUT", "/carts/1000", {"v": 2})
+        # Stopped before upstream answered: the write stays in the outbox
+        assert await queue.drain(timeout=0.05) == 1
+        assert queue.dropped == 0
+
+        upstream.gate.set()
+        restarted = make_queue(upstream, outbox=CartOutbox(store))
+        restarted.start()
+        assert await restarted.recover() == 1
+        await restarted.drain(timeout=1)
+
+        assert upstream.calls == [("POST", "/carts", {"v": 2})]
+        assert await CartOutbox(store).claim() == []
+
+    asyncio.run(scenario())
+
+
+def test_sqlite_outbox_only_removes_the_latest_write(tmp_path):
+    async def scenario():
+        store = SQLiteCartStore(str(tmp_path / "carts.sqlite3"))
+        await store.start()
+
+        first = await store.put_pending_write("worker-a", 1, 1, PendingWrite("PUT", "/carts/1", {"v": 1}))
+        second = await store.put_pending_write("worker-b", 1, 1, PendingWrite("PUT", "/carts/1", {"v": 2}))
+        await store.put_pending_write("worker-a", 1, 2, PendingWrite("PUT", "/carts/2", {"v": 1}))
+        assert second > first
+
+        # The write sent first was replaced meanwhile: the newer one stays
+        await store.remove_pending_write(1, 1, first)
+
+        # Only the writes of owners that are gone are taken over
+        claimed = await store.claim_pending_writes("worker-c", gone=lambda owner: owner == "worker-b")
+        assert [(user_id, cart_id, write.body, write.seq) for user_id, cart_id, write in claimed] == [
+            (1, 1, {"v": 2}, second)
+        ]
+        assert await store.claim_pending_writes("worker-d", gone=lambda owner: owner == "worker-b") == []
+
+        await store.close()
+
+    asyncio.run(scenario())